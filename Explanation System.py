@@ -8,8 +8,10 @@
 import streamlit as st
 import pandas as pd
 import hashlib
-from inference_engine import CourseRecommendationEngine, Student, Course, Recommendation
-from knowledge_base_editor import load_data, display_courses, display_courses_by_semester_and_year, add_course, edit_course, delete_course, save_to_file
+from recommendation_pipeline import create_engine, normalize_student, validate_student
+from recommendation_cache import RecommendationCache
+from explanations import EXPLANATIONS_PER_PAGE, explanation_pages, recommendation_html
+from knowledge_base_editor import load_data, catalog_store, catalog_version, catalog_codes, course_summaries, display_courses, display_courses_by_semester_and_year, add_course, edit_course, delete_course, save_to_file
 
 # Set page configuration
 st.set_page_config(page_title="AIU Course Management & Recommendation System", page_icon="📚", layout="wide")
@@ -90,8 +92,62 @@ def check_password():
         return False
     return True
 
+def recommendation_engine():
+    # One engine per session; its Course facts stay declared between clicks
+    # and admin edits are applied to them incrementally
+    store = catalog_store()
+    if 'recommendation_engine' not in st.session_state:
+        st.session_state.recommendation_engine = create_engine(store.courses_df, store.catalog)
+    st.session_state.recommendation_engine.sync_catalog(store)
+    return st.session_state.recommendation_engine
+
+@st.cache_resource
+def recommendation_cache():
+    # Shared by all sessions; entries from an older catalog are carried over
+    # an edit when it cannot affect them, the rest age out
+    return RecommendationCache()
+
+def recommendation_view(student, result, version):
+    # Everything the result section shows, rendered to HTML once per result
+    # and kept in session state, so reruns from other widgets only re-emit it
+    courses, explanations = recommendation_html(result, course_summaries(version, st.session_state.courses_data))
+    return {
+        'catalog': version,
+        'semester': student['semester'],
+        'year': student['year'],
+        'total_credits': result['total_credits'],
+        'courses': courses,
+        'explanations': explanation_pages(explanations),
+        'explanation_count': len(explanations)
+    }
+
+def show_recommendation(view):
+    st.markdown('<div class="stCard">', unsafe_allow_html=True)
+    st.subheader("Recommended Courses")
+    if not view['courses']:
+        st.warning(f"No eligible courses for {view['semester']} Year {view['year']}.")
+    else:
+        st.success(f"Total Credits: {view['total_credits']}")
+        st.markdown(view['courses'], unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="stCard">', unsafe_allow_html=True)
+    st.subheader("Explanations")
+    pages = view['explanations']
+    if not pages:
+        st.info("No explanations available.")
+    else:
+        page = 1
+        if len(pages) > 1:
+            page = st.number_input("Page", min_value=1, max_value=len(pages), step=1, key="explanation_page")
+        start = (page - 1) * EXPLANATIONS_PER_PAGE
+        if len(pages) > 1:
+            st.caption(f"Showing {start + 1}–{start + len(pages[page - 1])} of {view['explanation_count']} explanations")
+        st.markdown(''.join(pages[page - 1]), unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
 def student_recommendation():
-    course_codes = st.session_state.courses_data['Course Code'].tolist()
+    version = catalog_version()
+    course_codes = catalog_codes(version, st.session_state.courses_data)
     with st.container():
         st.markdown('<div class="stCard">', unsafe_allow_html=True)
         st.subheader("Student Information")
@@ -109,116 +165,31 @@ def student_recommendation():
             failed_courses = st.multiselect("Failed Courses (if any)", course_codes, default=[])
         st.markdown('</div>', unsafe_allow_html=True)
         if st.button("Get Recommendations"):
-            errors = []
-            if not student_id:
-                errors.append("Student ID is required.")
-            if not (0.0 <= cgpa <= 4.0):
-                errors.append("CGPA must be between 0.0 and 4.0.")
-            if semester not in ['Fall', 'Spring']:
-                errors.append("Please select a semester ('Fall' or 'Spring').")
-            if year not in [1, 2, 3, 4]:
-                errors.append("Please select a year between 1 and 4.")
-            completed_set = set(completed_courses)
-            failed_set = set(failed_courses)
-            overlapping_courses = completed_set.intersection(failed_set)
-            if overlapping_courses:
-                errors.append(f"Error: The following courses cannot be both completed and failed: {', '.join(overlapping_courses)}")
-            invalid_failed = [course for course in failed_courses if course not in course_codes]
-            invalid_completed = [course for course in completed_courses if course not in course_codes]
-            if invalid_failed:
-                errors.append(f"Invalid failed courses: {', '.join(invalid_failed)}")
-            if invalid_completed:
-                errors.append(f"Invalid completed courses: {', '.join(invalid_completed)}")
+            student = normalize_student({
+                'student_id': student_id,
+                'cgpa': cgpa,
+                'completed_courses': completed_courses,
+                'failed_courses': failed_courses,
+                'semester': semester,
+                'year': year
+            })
+            errors = validate_student(student, course_codes)
             if errors:
+                st.session_state.pop('last_recommendation', None)
                 for error in errors:
                     st.error(error)
             else:
-                engine = CourseRecommendationEngine(st.session_state.courses_data)
-                engine.reset()
-                student_data = {
-                    'student_id': student_id,
-                    'cgpa': cgpa,
-                    'completed_courses': ','.join(completed_courses) if completed_courses else '',
-                    'failed_courses': ','.join(failed_courses) if failed_courses else '',
-                    'semester': semester,
-                    'year': year
-                }
-                engine.declare(Student(**student_data))
-                for _, row in st.session_state.courses_data.iterrows():
-                    course_code = row['Course Code']
-                    semester_offered = row['Semester Offered'].strip()
-                    course_year = int(row['Year'])
-                    credits = float(row['Credit Hours'])
-                    track = 'CS' if course_code.startswith('CSE') and course_code not in ['CSE493', 'CSE494'] else 'AI' if course_code.startswith('AIE') else 'Elective'
-                    if course_code.startswith('UC') or course_code.startswith('UE'):
-                        track = 'University'
-                    engine.declare(Course(
-                        course_id=course_code,
-                        credits=credits,
-                        prerequisites=row['Prerequisites'],
-                        corequisites=row['Co-requisites'],
-                        semester=semester_offered,
-                        track=track,
-                        year=course_year
-                    ))
-                engine.run()
-                if failed_courses:
-                    for course_id in failed_courses:
-                        if course_id:
-                            course = st.session_state.courses_data[st.session_state.courses_data['Course Code'] == course_id]
-                            if not course.empty:
-                                course = course.iloc[0]
-                                if course['Semester Offered'].lower() != semester.lower() or course['Year'] > year:
-                                    explanation = f"Note: Failed course {course_id} is not recommended in {semester} Year {year}. Retake it in {course['Semester Offered']} Year {course['Year']}."
-                                    if explanation not in engine.explanation_set:
-                                        engine.explanations.append(explanation)
-                                        engine.explanation_set.add(explanation)
-                recommended_courses = set(engine.recommendations)
-                completed_courses_set = set(completed_courses)
-                next_year = year + 1
-                for _, row in st.session_state.courses_data.iterrows():
-                    course_id = row['Course Code']
-                    semester_offered = row['Semester Offered'].lower()
-                    course_year = row['Year']
-                    completed = completed_courses if completed_courses else []
-                    prerequisites = row['Prerequisites']
-                    if (course_id not in recommended_courses and 
-                        course_id not in completed_courses_set and
-                        (semester_offered != semester.lower() or course_year > year) and 
-                        course_year <= next_year):
-                        explanation = f"Not recommended for {course_id}: Not available in {semester} Year {year}, available in {row['Semester Offered']} Year {course_year}."
-                        if explanation not in engine.explanation_set:
-                            engine.explanations.append(explanation)
-                            engine.explanation_set.add(explanation)
-                    if (course_id not in recommended_courses and 
-                        course_id not in completed_courses_set and
-                        course_year <= year and
-                        semester_offered == semester.lower()):
-                        engine.prerequisites_met(prerequisites, completed, course_id)
-                st.markdown('<div class="stCard">', unsafe_allow_html=True)
-                st.subheader("Recommended Courses")
-                if not engine.recommendations:
-                    st.warning(f"No eligible courses for {semester} Year {year}.")
-                else:
-                    st.success(f"Total Credits: {engine.total_credits}")
-                    for course_id in engine.recommendations:
-                        course = st.session_state.courses_data[st.session_state.courses_data['Course Code'] == course_id].iloc[0]
-                        st.markdown(
-                            f'<div class="recommended-course">✔ Recommended {course_id} ({course["Credit Hours"]} credits, {course["Semester Offered"]} Year {course["Year"]})</div>',
-                            unsafe_allow_html=True
-                        )
-                st.markdown('</div>', unsafe_allow_html=True)
-                st.markdown('<div class="stCard">', unsafe_allow_html=True)
-                st.subheader("Explanations")
-                if not engine.explanations:
-                    st.info("No explanations available.")
-                else:
-                    for explanation in engine.explanations:
-                        if "Recommended" in explanation:
-                            st.markdown(f'<div class="explanation-success">✅ {explanation}</div>', unsafe_allow_html=True)
-                        else:
-                            st.markdown(f'<div class="explanation-warning">⚠️ {explanation}</div>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
+                engine = recommendation_engine()
+                cache = recommendation_cache()
+                cache.sync(catalog_store())
+                result = cache.recommend(engine.courses_df, student, engine.course_facts, engine)
+                st.session_state.last_recommendation = recommendation_view(student, result, version)
+                st.session_state.explanation_page = 1
+        # The last result stays on screen across reruns until the next request
+        # or a catalog edit
+        view = st.session_state.get('last_recommendation')
+        if view is not None and view['catalog'] == version:
+            show_recommendation(view)
 
 # Main function
 def main():
@@ -7,6 +7,11 @@
 # inference engine code 
 get_ipython().system('pip install experta')
 from experta import *
+from course_catalog import SENIOR_PROJECTS, compile_catalog
+from course_selection import SELECTIONS, knapsack_select
+from explanations import Reason, CREDIT_LIMIT_EXPLANATIONS, RECOMMENDATION_REASONS
+
+SENIOR_STANDING_CREDITS = 90
 
 class Student(Fact):
     """Student Information"""
@@ -20,162 +25,417 @@ class Recommendation(Fact):
     """Recommended Courses"""
     pass
 
-class CourseRecommendationEngine(KnowledgeEngine):
-    def __init__(self, courses_df):
-        super().__init__()
+class TermCourse(Fact):
+    """A course the student ``student_id`` could take this term: offered in
+    their semester, at or below their year and not completed yet. ``failed``
+    is set for retakes. Declared per run from the Course facts, so the
+    recommendation rules need no TEST conditions."""
+    pass
+
+class Transcript:
+    """A student's completed and failed courses as int bitmasks over catalog ids.
+
+    Bit i is set when the course with catalog id i (see CatalogIndex) is
+    completed or failed, so requisite, "already completed" and "failed" checks
+    are single mask operations.
+    """
+    __slots__ = ('completed', 'failed')
+
+    def __init__(self, completed=0, failed=0):
+        self.completed = completed
+        self.failed = failed
+
+    @classmethod
+    def from_courses(cls, catalog, completed_courses=(), failed_courses=()):
+        return cls(catalog.mask(completed_courses), catalog.mask(failed_courses))
+
+    def has_completed(self, cid):
+        return self.completed >> cid & 1 == 1
+
+    def has_failed(self, cid):
+        return self.failed >> cid & 1 == 1
+
+    def satisfies(self, required, available=0):
+        """True when every course in the ``required`` mask is completed (or in ``available``)."""
+        return required & ~(self.completed | available) == 0
+
+    def __eq__(self, other):
+        return isinstance(other, Transcript) and self.completed == other.completed and self.failed == other.failed
+
+    def __hash__(self):
+        return hash((self.completed, self.failed))
+
+    def __repr__(self):
+        return f"Transcript(completed={self.completed:#x}, failed={self.failed:#x})"
+
+def credit_limit_for(cgpa):
+    if cgpa >= 3.5:
+        return 22
+    if 2.0 <= cgpa < 3.5:
+        return 20
+    if cgpa < 2.0:
+        return 13
+    return None
+
+# The recommendation rules as passes in firing order, for evaluators without a
+# RETE network (fast_engine, what_if): experta runs all salience-20
+# activations, then salience 15, then 0; within a salience the most recently
+# declared Course fact fires first (DepthStrategy).
+PASSES = [
+    ('failed', lambda course, transcript: transcript.has_failed(course['cid'])),
+    ('core', lambda course, transcript: course['track'] == 'CS'),
+    ('other', lambda course, transcript: True)
+]
+
+
+class EligibilityChecks:
+    """Per-run state and the checks shared by every recommendation engine."""
+
+    # How eligible courses share the credit cap (see course_selection.py)
+    selection = 'greedy'
+    # Seat ledger every recommendation reserves against (see seat_ledger.py)
+    seats = None
+
+    # One student's run. A run may hold several Student facts; each student_id
+    # keeps its own copy of these and select_student() swaps it in.
+    STUDENT_STATE = ('recommendations', 'candidates', 'explanations', 'explanation_set', 'total_credits',
+                     'max_credits', 'transcript')
+
+    def set_selection(self, selection):
+        if selection not in SELECTIONS:
+            raise ValueError(f"Unknown course selection '{selection}' (expected one of: {', '.join(SELECTIONS)})")
+        self.selection = selection
+
+    def set_seats(self, seats):
+        self.seats = seats
+
+    def clear_run_state(self):
+        self.student_runs = {}
+        self.current_student = None
+        self.clear_student_state()
+        self.failed_course_warnings = []
+        self.completed_credits = {}
+
+    def clear_student_state(self):
         self.recommendations = []
+        self.candidates = {}
         self.explanations = []
         self.explanation_set = set()
         self.total_credits = 0
         self.max_credits = 0
-        self.courses_df = courses_df
-        self.failed_course_warnings = []
+        self.transcript = None
+
+    def select_student(self, student_id):
+        """Make ``student_id``'s recommendations, credits and explanations the
+        current ones, starting an empty set for a student not seen in this run."""
+        if student_id == self.current_student:
+            return
+        if self.current_student is not None:
+            self.student_runs[self.current_student] = {name: getattr(self, name) for name in self.STUDENT_STATE}
+        state = self.student_runs.get(student_id)
+        if state is None:
+            self.clear_student_state()
+            self.student_runs[student_id] = None
+        else:
+            for name, value in state.items():
+                setattr(self, name, value)
+        self.current_student = student_id
+
+    def sync_catalog(self, store):
+        """Bring the engine's catalog up to ``store``'s version (see CatalogStore).
+
+        Course facts before the first changed position keep their place; only
+        the ones from there on are redeclared, in catalog order, so the firing
+        order matches an engine built from scratch.
+        """
+        if self.course_facts is not None and self.course_facts is store.course_facts:
+            return
+        changes = store.changes_since(self.catalog_version) if self.catalog_version is not None else []
+        self.courses_df = store.courses_df
+        self.catalog = store.catalog
+        if self.course_facts is None or not changes:
+            self.declare_courses(store.course_facts)
+        else:
+            self.replace_courses(min(change.position for change in changes), store.course_facts)
+        self.catalog_version = store.version
 
     def prerequisites_met(self, course_prereqs, completed_courses, course_id):
-        if not course_prereqs or course_prereqs == "SENIOR STANDING":
-            if course_prereqs == "SENIOR STANDING":
-                if not self.has_senior_standing(completed_courses):
-                    explanation = f"Not recommended for {course_id}: Requires senior standing (90+ credits)."
-                    if explanation not in self.explanation_set:
-                        self.explanations.append(explanation)
-                        self.explanation_set.add(explanation)
-                    return False
-                return True
+        idx = self.catalog.ids.get(course_id)
+        if idx is not None and self.catalog.prerequisites[idx] == course_prereqs:
+            senior_standing = self.catalog.senior_standing[idx]
+            required = self.catalog.prereq_masks[idx]
+        else:
+            # Course not in the compiled catalog: compile its prerequisites now
+            senior_standing = course_prereqs == "SENIOR STANDING"
+            required = 0 if senior_standing else self.catalog.compile_requisites(course_prereqs)[1]
+        if senior_standing:
+            if not self.has_senior_standing(completed_courses):
+                self.add_explanation(Reason.SENIOR_STANDING, course_id)
+                return False
             return True
-        prereqs = course_prereqs.replace(' AND ', ',').split(',')
-        met = all(prereq.strip() in completed_courses for prereq in prereqs)
+        met = required == 0 or self.transcript_of(completed_courses).satisfies(required)
         if not met:
-            explanation = f"Not recommended for {course_id}: Prerequisites not met ({course_prereqs})."
-            if explanation not in self.explanation_set:
-                self.explanations.append(explanation)
-                self.explanation_set.add(explanation)
+            self.add_explanation(Reason.PREREQUISITES_NOT_MET, course_id, course_prereqs)
         return met
 
     def corequisites_satisfied(self, course_coreqs, completed_courses, current_recommendations, course_id):
         if not course_coreqs:
             return True
-        coreqs = course_coreqs.split(',')
-        satisfied = all(coreq.strip() in completed_courses or coreq.strip() in current_recommendations for coreq in coreqs)
+        idx = self.catalog.ids.get(course_id)
+        if idx is not None and self.catalog.corequisites[idx] == course_coreqs:
+            required = self.catalog.coreq_masks[idx]
+        else:
+            required = self.catalog.compile_requisites(course_coreqs, separators=(',',))[1]
+        satisfied = self.transcript_of(completed_courses).satisfies(required, self.catalog.mask(current_recommendations))
         if not satisfied:
-            explanation = f"Not recommended for {course_id}: Co-requisites not met ({course_coreqs})."
-            if explanation not in self.explanation_set:
-                self.explanations.append(explanation)
-                self.explanation_set.add(explanation)
+            self.add_explanation(Reason.COREQUISITES_NOT_MET, course_id, course_coreqs)
         return satisfied
 
+    def transcript_of(self, completed_courses):
+        if isinstance(completed_courses, Transcript):
+            return completed_courses
+        return Transcript.from_courses(self.catalog, completed_courses)
+
+    def add_explanation(self, reason, course_id=None, *params):
+        """Append an explanation record (see explanations.py), at most one per reason and course."""
+        key = (reason, course_id)
+        if key not in self.explanation_set:
+            self.explanation_set.add(key)
+            self.explanations.append((reason, course_id, params))
+
     def has_senior_standing(self, completed_courses):
-        total_completed_credits = 0
-        for course_id in completed_courses:
-            course = self.courses_df[self.courses_df['Course Code'] == course_id]
-            if not course.empty:
-                total_completed_credits += course.iloc[0]['Credit Hours']
-        return total_completed_credits >= 90
-
-    @Rule(Student(cgpa=GE(3.5)), salience=100)
-    def set_credit_limit_overload(self):
-        self.max_credits = 22
-        self.explanations.append("Credit limit set to 22 (overload) because CGPA ≥ 3.5.")
-        self.explanation_set.add("Credit limit set to 22 (overload) because CGPA ≥ 3.5.")
-
-    @Rule(Student(cgpa=GE(2.0) & LT(3.5)), salience=100)
-    def set_credit_limit_full_load(self):
-        self.max_credits = 20
-        self.explanations.append("Credit limit set to 20 (full load) because 2.0 ≤ CGPA < 3.5.")
-        self.explanation_set.add("Credit limit set to 20 (full load) because 2.0 ≤ CGPA < 3.5.")
-
-    @Rule(Student(cgpa=LT(2.0)), salience=100)
-    def set_credit_limit_half_load(self):
-        self.max_credits = 13
-        self.explanations.append("Credit limit set to 13 (half load) because CGPA < 2.0.")
-        self.explanation_set.add("Credit limit set to 13 (half load) because CGPA < 2.0.")
-
-    @Rule(AS.student << Student(failed_courses=MATCH.failed, completed_courses=MATCH.completed, year=MATCH.student_year, semester=MATCH.semester),
-          AS.course << Course(course_id=MATCH.course_id,
-                             prerequisites=MATCH.prereqs,
-                             corequisites=MATCH.coreqs,
-                             semester=MATCH.course_semester,
-                             credits=MATCH.credits,
-                             year=MATCH.course_year),
-          TEST(lambda failed, course_id: failed and course_id in failed.split(',')),
-          TEST(lambda course_semester, semester: course_semester.lower() == semester.lower().strip()),
-          TEST(lambda student_year, course_year: course_year <= student_year),
-          TEST(lambda completed, course_id: not completed or course_id not in completed.split(',')),
-          salience=20)
-    def recommend_failed_course(self, student, course_id, prereqs, coreqs, credits):
-        completed = student['completed_courses'].split(',') if student['completed_courses'] else []
-        if self.prerequisites_met(prereqs, completed, course_id) and self.corequisites_satisfied(coreqs, completed, self.recommendations, course_id):
-            if self.total_credits + credits <= self.max_credits:
-                self.recommendations.append(course_id)
-                self.total_credits += credits
-                self.declare(Recommendation(course_id=course_id))
-                explanation = f"Recommended {course_id} because you failed it previously and all prerequisites and co-requisites are met."
-                self.explanations.append(explanation)
-                self.explanation_set.add(explanation)
-            else:
-                explanation = f"Not recommended for {course_id}: Exceeds credit limit of {self.max_credits} credits."
-                if explanation not in self.explanation_set:
-                    self.explanations.append(explanation)
-                    self.explanation_set.add(explanation)
-
-    @Rule(AS.student << Student(completed_courses=MATCH.completed, year=MATCH.student_year, semester=MATCH.semester),
-          AS.course << Course(course_id=MATCH.course_id,
-                             prerequisites=MATCH.prereqs,
-                             corequisites=MATCH.coreqs,
-                             semester=MATCH.course_semester,
-                             track='CS',
-                             credits=MATCH.credits,
-                             year=MATCH.course_year),
-          NOT(Recommendation(course_id=MATCH.course_id)),
-          TEST(lambda course_semester, semester: course_semester.lower() == semester.lower().strip()),
-          TEST(lambda student_year, course_year: course_year <= student_year),
-          TEST(lambda completed, course_id: not completed or course_id not in completed.split(',')),
-          salience=15)
-    def recommend_core_cs_course(self, student, course_id, prereqs, coreqs, credits):
-        completed = student['completed_courses'].split(',') if student['completed_courses'] else []
-        if self.prerequisites_met(prereqs, completed, course_id) and self.corequisites_satisfied(coreqs, completed, self.recommendations, course_id):
-            if course_id in ['CSE493', 'CSE494'] and not self.has_senior_standing(completed):
-                explanation = f"Not recommended for {course_id}: Requires senior standing (90+ credits)."
-                if explanation not in self.explanation_set:
-                    self.explanations.append(explanation)
-                    self.explanation_set.add(explanation)
+        # Credit totals come from the catalog's credit vector and are memoized
+        # per completed set for the current run
+        completed = self.transcript_of(completed_courses).completed
+        total_completed_credits = self.completed_credits.get(completed)
+        if total_completed_credits is None:
+            total_completed_credits = self.completed_credits[completed] = self.catalog.credits_of(completed)
+        return total_completed_credits >= SENIOR_STANDING_CREDITS
+
+    def set_credit_limit(self, max_credits):
+        self.max_credits = max_credits
+        self.explanations.append((Reason.CREDIT_LIMIT, None, (max_credits,)))
+        self.explanation_set.add((Reason.CREDIT_LIMIT, None))
+
+    def consider_course(self, course_id, prereqs, coreqs, credits, completed, reason):
+        """Body of the recommendation rules: check requisites and the credit cap,
+        then recommend ``course_id`` or explain why not. With the knapsack
+        selection the cap is left to select_candidates()."""
+        knapsack = self.selection == 'knapsack'
+        # Takes the place of a NOT(Recommendation) pattern, which experta would
+        # check against every pending activation of every student in the run
+        if course_id in self.recommendations or knapsack and course_id in self.candidates:
+            return
+        current = self.candidates if knapsack else self.recommendations
+        if self.prerequisites_met(prereqs, completed, course_id) and self.corequisites_satisfied(coreqs, completed, current, course_id):
+            if reason == 'core' and course_id in SENIOR_PROJECTS and not self.has_senior_standing(completed):
+                self.add_explanation(Reason.SENIOR_STANDING, course_id)
                 return
-            if self.total_credits + credits <= self.max_credits:
-                self.recommendations.append(course_id)
-                self.total_credits += credits
-                self.declare(Recommendation(course_id=course_id))
-                explanation = f"Recommended {course_id} as a core Computer Science course because all prerequisites and co-requisites are met."
-                self.explanations.append(explanation)
-                self.explanation_set.add(explanation)
+            if knapsack:
+                if self.take_seat(course_id, completed, reason, reserve=False):
+                    self.candidates[course_id] = (credits, reason)
+            elif self.total_credits + credits <= self.max_credits:
+                if self.take_seat(course_id, completed, reason):
+                    self.recommend_course(course_id, credits, reason)
             else:
-                explanation = f"Not recommended for {course_id}: Exceeds credit limit of {self.max_credits} credits."
-                if explanation not in self.explanation_set:
-                    self.explanations.append(explanation)
-                    self.explanation_set.add(explanation)
-
-    @Rule(AS.student << Student(completed_courses=MATCH.completed, year=MATCH.student_year, semester=MATCH.semester),
-          AS.course << Course(course_id=MATCH.course_id,
-                             prerequisites=MATCH.prereqs,
-                             corequisites=MATCH.coreqs,
-                             semester=MATCH.course_semester,
-                             credits=MATCH.credits,
-                             year=MATCH.course_year),
-          NOT(Recommendation(course_id=MATCH.course_id)),
-          TEST(lambda course_semester, semester: course_semester.lower() == semester.lower().strip()),
-          TEST(lambda student_year, course_year: course_year <= student_year),
-          TEST(lambda completed, course_id: not completed or course_id not in completed.split(',')))
-    def recommend_other_course(self, student, course_id, prereqs, coreqs, credits):
-        completed = student['completed_courses'].split(',') if student['completed_courses'] else []
-        if self.prerequisites_met(prereqs, completed, course_id) and self.corequisites_satisfied(coreqs, completed, self.recommendations, course_id):
-            if self.total_credits + credits <= self.max_credits:
-                self.recommendations.append(course_id)
-                self.total_credits += credits
-                self.declare(Recommendation(course_id=course_id))
-                explanation = f"Recommended {course_id} because all prerequisites and co-requisites are met."
-                self.explanations.append(explanation)
-                self.explanation_set.add(explanation)
-            else:
-                explanation = f"Not recommended for {course_id}: Exceeds credit limit of {self.max_credits} credits."
-                if explanation not in self.explanation_set:
-                    self.explanations.append(explanation)
-                    self.explanation_set.add(explanation)
+                self.add_explanation(Reason.EXCEEDS_CREDIT_LIMIT, course_id, self.max_credits)
+
+    def seat_priority(self, completed, reason):
+        if reason == 'failed':
+            return 'retake'
+        return 'senior' if self.has_senior_standing(completed) else 'standard'
+
+    def take_seat(self, course_id, completed, reason, reserve=True):
+        """Reserve a seat in ``course_id`` for the current student (with
+        ``reserve`` False, only check one is open); explain if none is."""
+        if self.seats is None:
+            return True
+        priority = self.seat_priority(completed, reason)
+        if reserve:
+            seated = self.seats.reserve(self.current_student, course_id, priority)
+        else:
+            seated = self.seats.can_reserve(self.current_student, course_id, priority)
+        if not seated:
+            self.add_explanation(Reason.SECTION_FULL, course_id, self.seats.capacity(course_id))
+        return seated
+
+    def recommend_course(self, course_id, credits, reason):
+        self.recommendations.append(course_id)
+        self.total_credits += credits
+        self.declare(Recommendation(student_id=self.current_student, course_id=course_id))
+        self.explanations.append((Reason.RECOMMENDED, course_id, (reason,)))
+        self.explanation_set.add((Reason.RECOMMENDED, course_id))
+
+    def select_candidates(self):
+        """Knapsack selection stage, run after the rules: recommend the best
+        set of the collected candidates under the credit cap.
+
+        A chosen course whose seat is gone by now leaves the candidates, with
+        the courses whose co-requisites relied on it, and the rest are
+        selected again, so its credits go to other courses. Seats taken for
+        courses the final selection drops are given back.
+        """
+        if not self.candidates:
+            return
+        candidates = self.candidates
+        chosen, seated = set(), set()
+        while candidates:
+            chosen = knapsack_select(self.catalog, candidates, self.max_credits)
+            full = set()
+            for course_id, (credits, reason) in candidates.items():
+                if course_id in chosen and course_id not in seated:
+                    if self.take_seat(course_id, self.transcript, reason):
+                        seated.add(course_id)
+                    else:
+                        full.add(course_id)
+            if not full:
+                break
+            candidates = self.drop_candidates(candidates, full)
+        if self.seats is not None:
+            for course_id in seated - chosen:
+                self.seats.release(self.current_student, course_id)
+        for course_id, (credits, reason) in self.candidates.items():
+            if course_id in chosen:
+                self.recommend_course(course_id, credits, reason)
+            elif course_id in candidates:
+                self.add_explanation(Reason.EXCEEDS_CREDIT_LIMIT, course_id, self.max_credits)
+        self.candidates = {}
+
+    def drop_candidates(self, candidates, dropped):
+        """``candidates`` without the ``dropped`` courses and the ones whose
+        co-requisites are no longer met without them."""
+        remaining = {course_id: value for course_id, value in candidates.items() if course_id not in dropped}
+        changed = True
+        while changed:
+            changed = False
+            for course_id in list(remaining):
+                coreqs = self.catalog.corequisites[self.catalog.ids[course_id]]
+                if not self.corequisites_satisfied(coreqs, self.transcript, remaining, course_id):
+                    del remaining[course_id]
+                    changed = True
+        return remaining
+
+
+class CourseRecommendationEngine(EligibilityChecks, KnowledgeEngine):
+    def __init__(self, courses_df, catalog=None):
+        super().__init__()
+        self.courses_df = courses_df
+        self.catalog = catalog if catalog is not None else compile_catalog(courses_df)
+        self.course_facts = None
+        self.catalog_version = None
+        self.term_courses = {}
+        self.clear_run_state()
+
+    def reset(self, **kwargs):
+        # Clear per-run state too, so one engine can be reused across students
+        super().reset(**kwargs)
+        self.course_facts = None
+        self.catalog_version = None
+        self.term_courses = {}
+        self.clear_run_state()
+
+    def declare_courses(self, course_facts):
+        """Reset and declare the catalog's Course facts (see course_fact_fields).
+
+        The facts and their rule-network matches stay in place across
+        start_run() calls, so only the Student fact is matched per run.
+        """
+        self.reset()
+        for fields in course_facts:
+            self.declare(Course(**fields))
+        self.course_facts = course_facts
+
+    def replace_courses(self, first, course_facts):
+        """Retract the Course facts from id ``first`` on and declare ``course_facts[first:]``."""
+        for fact in [fact for fact in self.facts.values() if isinstance(fact, Course) and fact['cid'] >= first]:
+            self.retract(fact)
+        for fields in course_facts[first:]:
+            self.declare(Course(**fields))
+        self.course_facts = course_facts
+        self.term_courses = {}
+
+    def start_run(self):
+        """Retract the previous run's Student, TermCourse and Recommendation
+        facts and clear per-run state, keeping the declared Course facts."""
+        for fact in [fact for fact in self.facts.values() if isinstance(fact, (Student, TermCourse, Recommendation))]:
+            self.retract(fact)
+        self.clear_run_state()
+
+    def offered_courses(self, semester, year):
+        """Course facts offered in ``semester`` up to ``year``, in declaration
+        order; the semester is compared case- and whitespace-insensitively.
+        Cached per term until the Course facts change."""
+        key = (semester.lower().strip(), year)
+        courses = self.term_courses.get(key)
+        if courses is None:
+            courses = self.term_courses[key] = [
+                fact for fact in self.facts.values()
+                if isinstance(fact, Course) and fact['semester'].lower().strip() == key[0] and fact['year'] <= year]
+        return courses
+
+    def run(self, steps=float('inf')):
+        super().run(steps)
+        for student_id in list(self.student_runs):
+            self.select_student(student_id)
+            self.select_candidates()
+
+    @Rule(Student(student_id=MATCH.student_id, cgpa=GE(3.5)), salience=100)
+    def set_credit_limit_overload(self, student_id):
+        self.select_student(student_id)
+        self.set_credit_limit(22)
+
+    @Rule(Student(student_id=MATCH.student_id, cgpa=GE(2.0) & LT(3.5)), salience=100)
+    def set_credit_limit_full_load(self, student_id):
+        self.select_student(student_id)
+        self.set_credit_limit(20)
+
+    @Rule(Student(student_id=MATCH.student_id, cgpa=LT(2.0)), salience=100)
+    def set_credit_limit_half_load(self, student_id):
+        self.select_student(student_id)
+        self.set_credit_limit(13)
+
+    @Rule(Student(student_id=MATCH.student_id, transcript=MATCH.transcript, year=MATCH.student_year,
+                  semester=MATCH.semester),
+          salience=200)
+    def declare_term_courses(self, student_id, transcript, student_year, semester):
+        # The term, year and completion checks, done once per student; the
+        # rules below only match the TermCourse facts that pass them
+        self.select_student(student_id)
+        self.transcript = transcript
+        for course in self.offered_courses(semester, student_year):
+            if not transcript.has_completed(course['cid']):
+                self.declare(TermCourse(student_id=student_id, course_id=course['course_id'], cid=course['cid'],
+                                        prerequisites=course['prerequisites'], corequisites=course['corequisites'],
+                                        credits=course['credits'], track=course['track'],
+                                        failed=transcript.has_failed(course['cid'])))
+
+    @Rule(TermCourse(student_id=MATCH.student_id,
+                     course_id=MATCH.course_id,
+                     prerequisites=MATCH.prereqs,
+                     corequisites=MATCH.coreqs,
+                     credits=MATCH.credits,
+                     failed=True),
+          salience=20)
+    def recommend_failed_course(self, student_id, course_id, prereqs, coreqs, credits):
+        self.select_student(student_id)
+        self.consider_course(course_id, prereqs, coreqs, credits, self.transcript, 'failed')
+
+    @Rule(TermCourse(student_id=MATCH.student_id,
+                     course_id=MATCH.course_id,
+                     prerequisites=MATCH.prereqs,
+                     corequisites=MATCH.coreqs,
+                     credits=MATCH.credits,
+                     track='CS'),
+          salience=15)
+    def recommend_core_cs_course(self, student_id, course_id, prereqs, coreqs, credits):
+        self.select_student(student_id)
+        self.consider_course(course_id, prereqs, coreqs, credits, self.transcript, 'core')
 
+    @Rule(TermCourse(student_id=MATCH.student_id,
+                     course_id=MATCH.course_id,
+                     prerequisites=MATCH.prereqs,
+                     corequisites=MATCH.coreqs,
+                     credits=MATCH.credits))
+    def recommend_other_course(self, student_id, course_id, prereqs, coreqs, credits):
+        self.select_student(student_id)
+        self.consider_course(course_id, prereqs, coreqs, credits, self.transcript, 'other')
@@ -0,0 +1,312 @@
+# batch_recommendation.py
+# Headless cohort runs: read student records from CSV or JSONL and stream one
+# JSON result per student.
+#
+#   python batch_recommendation.py students.csv --catalog Corrected_CSE_Courses3ver2.csv -o results.jsonl
+#   python batch_recommendation.py students.csv --workers 8 --chunk-size 64
+#   python batch_recommendation.py students.csv --profile profile.json
+#   python batch_recommendation.py students.csv -o results.csv.gz --resume
+#   python batch_recommendation.py students.csv --section-capacity 120 --seat-store seats.db
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from course_catalog import CATALOG_FILE, SNAPSHOT_SUFFIX, course_fact_fields, section_capacities
+from catalog_snapshot import CatalogSnapshot, load_catalog
+from course_selection import SELECTIONS
+from engine_profiler import EngineProfile, profile_engine
+from explanations import EXPLANATION_FORMATS
+from inference_engine import SENIOR_STANDING_CREDITS
+from recommendation_pipeline import (ENGINES, create_engine, normalize_student, validate_student, run_engine,
+                                     recommendation_result, recommend_students, student_groups, result_json)
+from recommendation_cache import RecommendationCache
+from recommendation_export import EXPORT_FORMATS, ResultExport
+from seat_ledger import SEAT_PRIORITIES, SeatLedger, SeatStore
+
+
+def read_students(path):
+    """Yield raw student records from a .csv or .jsonl file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            for record in csv.DictReader(f):
+                yield record
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def seat_tier(record, catalog):
+    """SEAT_PRIORITIES entry of a raw record's reservations other than
+    retakes: 'senior' or 'standard'."""
+    student = normalize_student(record)
+    senior = catalog.credits_of(catalog.mask(student['completed_courses'])) >= SENIOR_STANDING_CREDITS
+    return 'senior' if senior else 'standard'
+
+
+def priority_order(path, catalog):
+    """Records of ``path`` in seat reservation order after the retakes:
+    seniors, then the rest, each tier in file order. The file is read once
+    per tier instead of being held in memory."""
+    for tier in SEAT_PRIORITIES[1:]:
+        for record in read_students(path):
+            if seat_tier(record, catalog) == tier:
+                yield record
+
+
+def reserve_retakes(students, courses_df, seats, engine_kind=None, catalog=None, selection=None):
+    """Take the retake seats of ``students`` before any other seat: each
+    student with a failed course is run with only 'retake' reservations
+    taken (see SeatLedger.reserving). Their other seats are left to the
+    run that follows."""
+    seats.reserving = ('retake',)
+    try:
+        retaking = (record for record in students if normalize_student(record)['failed_courses'])
+        for _ in recommend_batch(retaking, courses_df, engine_kind, None, catalog, selection, seats=seats):
+            pass
+    finally:
+        seats.reserving = tuple(SEAT_PRIORITIES)
+
+
+def recommend_batch(students, courses_df, engine_kind=None, cache=None, catalog=None, selection=None, profile=None,
+                    run_size=1, seats=None):
+    """Yield one result dict per student, in input order.
+
+    The catalog is parsed into Course fact fields once and a single engine
+    (with its compiled rule network) is reset and reused for every student.
+    With ``run_size`` > 1, that many students share each engine run (see
+    recommend_students). With a RecommendationCache, students with identical
+    inputs are computed once. Given an EngineProfile, the engine's rule
+    activity is recorded into it. Given a SeatLedger, recommendations
+    reserve seats in it, in student order, the seats a student holds in
+    courses they are not recommended are given back, and the cache is not
+    used.
+    """
+    engine = create_engine(courses_df, catalog, engine_kind, selection)
+    if seats is not None:
+        engine.set_seats(seats)
+        cache = None
+    if profile is None:
+        yield from _recommend_with(engine, students, courses_df, cache, run_size, seats)
+    else:
+        with profile_engine(engine, profile):
+            yield from _recommend_with(engine, students, courses_df, cache, run_size, seats)
+
+
+def _recommend_with(engine, students, courses_df, cache, run_size, seats=None):
+    course_codes = set(courses_df['Course Code'])
+    course_facts = course_fact_fields(courses_df)
+    for records in record_blocks(students, run_size):
+        for result in recommend_block(records, courses_df, course_codes, course_facts, engine, cache):
+            if seats is not None and 'errors' not in result:
+                seats.release_unused(result['student_id'], result['recommendations'])
+            yield result
+
+
+def record_blocks(records, size):
+    records = iter(records)
+    while True:
+        block = list(itertools.islice(records, size))
+        if not block:
+            return
+        yield block
+
+
+def recommend_block(records, courses_df, course_codes, course_facts, engine, cache=None):
+    """Results for a block of raw records, in order; the valid ones are
+    computed in as few engine runs as their student ids allow."""
+    students = [normalize_student(record) for record in records]
+    errors = [validate_student(student, course_codes) for student in students]
+    computed = []
+    for group in student_groups([student for student, invalid in zip(students, errors) if not invalid], len(records)):
+        if cache is not None:
+            computed.extend(cache.recommend_many(courses_df, group, course_facts, engine))
+        else:
+            computed.extend(recommend_students(courses_df, group, course_facts, engine))
+    computed = iter(computed)
+    return [{'student_id': student['student_id'], 'errors': invalid} if invalid else next(computed)
+            for student, invalid in zip(students, errors)]
+
+
+# Per-process state for parallel runs: each worker parses the catalog and
+# builds its engine once, in _init_worker, then serves many chunks. With a
+# snapshot, workers map the file instead of receiving a pickled DataFrame.
+_worker = {}
+
+
+def _init_worker(courses_df, engine_kind, cache_size, cache_db, snapshot_path=None, selection=None):
+    catalog = None
+    if snapshot_path:
+        _worker['snapshot'] = CatalogSnapshot(snapshot_path)
+        courses_df = _worker['snapshot'].to_dataframe()
+        catalog = _worker['snapshot'].catalog_index(courses_df)
+    _worker['courses_df'] = courses_df
+    _worker['course_codes'] = set(courses_df['Course Code'])
+    _worker['course_facts'] = course_fact_fields(courses_df)
+    _worker['engine'] = create_engine(courses_df, catalog, engine_kind, selection)
+    _worker['cache'] = RecommendationCache(cache_size, cache_db) if cache_size else None
+
+
+def _recommend_in_worker(record):
+    student = normalize_student(record)
+    errors = validate_student(student, _worker['course_codes'])
+    if errors:
+        return {'student_id': student['student_id'], 'errors': errors}
+    if _worker['cache'] is not None:
+        return _worker['cache'].recommend(_worker['courses_df'], student, _worker['course_facts'], _worker['engine'])
+    engine = run_engine(_worker['courses_df'], student, _worker['course_facts'], _worker['engine'])
+    return recommendation_result(student, engine)
+
+
+def _recommend_chunk_in_worker(records, run_size=None):
+    """Results for ``records``, ``run_size`` of them (all by default) sharing
+    each engine run (see recommend_block)."""
+    if run_size == 1:
+        return [_recommend_in_worker(record) for record in records]
+    results = []
+    for block in record_blocks(records, run_size or len(records)):
+        results.extend(recommend_block(block, _worker['courses_df'], _worker['course_codes'], _worker['course_facts'],
+                                       _worker['engine'], _worker['cache']))
+    return results
+
+
+def ordered_map(executor, fn, items, window):
+    """executor.map that keeps at most ``window`` tasks in flight instead of
+    submitting every item up front, so a large cohort is neither read nor
+    held as finished results ahead of the consumer."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def recommend_parallel(students, courses_df, workers=None, chunk_size=32, engine_kind=None, cache_size=0, cache_db=None,
+                       snapshot_path=None, selection=None, run_size=1):
+    """Like recommend_batch, but shards students across worker processes.
+
+    Results are yielded in input order and are identical to sequential runs.
+    Each worker keeps its own in-memory cache of ``cache_size`` entries; a
+    ``cache_db`` SQLite file is shared by all of them. Given a catalog
+    ``snapshot_path``, ``courses_df`` may be None: every worker maps the
+    snapshot, so they share one physical copy of its arrays (each still
+    builds its own string columns, index and Course facts). With ``run_size`` > 1,
+    workers run blocks of that many students together. Students are read
+    and sent a chunk at a time, two chunks per worker ahead of the output.
+    """
+    workers = workers or os.cpu_count() or 1
+    initargs = (None if snapshot_path else courses_df, engine_kind, cache_size, cache_db, snapshot_path, selection)
+    chunk_size = run_size * max(1, chunk_size // run_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        for results in ordered_map(executor, partial(_recommend_chunk_in_worker, run_size=run_size),
+                                   record_blocks(students, chunk_size), 2 * workers):
+            yield from results
+
+
+def write_jsonl(results, out):
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate course recommendations for a cohort of students.")
+    parser.add_argument('students', help="CSV or JSONL file with student_id, cgpa, year, semester, completed_courses, failed_courses")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot (see catalog_snapshot.py)")
+    parser.add_argument('-o', '--output', help="Output file: .jsonl, .csv or .parquet, with .gz to compress "
+                                               "(default: JSONL on stdout; see recommendation_export.py)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help="Output format (default: from the --output suffix)")
+    parser.add_argument('--gzip', action='store_true', help="Compress the output even without a .gz suffix")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted export of the same students from its last checkpoint")
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help="Results written between checkpoints")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (0 = one per CPU, 1 = run in this process)")
+    parser.add_argument('--chunk-size', type=int, default=32, help="Students sent to a worker at a time")
+    parser.add_argument('--run-size', type=int, default=1,
+                        help="Students declared into one engine run, sharing its Course fact matching")
+    parser.add_argument('--engine', choices=list(ENGINES), help="Recommendation engine (default: $RECOMMENDATION_ENGINE or experta)")
+    parser.add_argument('--selection', choices=SELECTIONS, help="How eligible courses share the credit cap (default: $RECOMMENDATION_SELECTION or greedy)")
+    parser.add_argument('--explanations', choices=EXPLANATION_FORMATS, default='text',
+                        help="Write explanations as text or as reason/course_id/params records")
+    parser.add_argument('--cache-size', type=int, default=10000, help="Cached results kept in memory (0 disables the cache)")
+    parser.add_argument('--cache-db', help="SQLite file for a persistent result cache")
+    parser.add_argument('--seats', action='store_true',
+                        help="Reserve a seat for every recommendation, in priority order, against the catalog's "
+                             "Sections / Section Capacity columns (see seat_ledger.py)")
+    parser.add_argument('--section-capacity', type=int,
+                        help="Seats per section for courses without a Section Capacity (implies --seats)")
+    parser.add_argument('--seat-store', help="SQLite file keeping the reservations (implies --seats)")
+    parser.add_argument('--profile', help="Write rule activations, TEST evaluations and timings of the experta engine "
+                                          "to this JSON file (see engine_profiler.py)")
+    args = parser.parse_args(argv)
+    if args.run_size < 1:
+        parser.error("--run-size must be at least 1")
+    if args.profile and args.workers != 1:
+        parser.error("--profile needs --workers 1")
+    if args.profile and args.engine == 'fast':
+        parser.error("--profile needs the experta engine")
+    if not args.output and (args.format not in (None, 'jsonl') or args.gzip or args.resume):
+        parser.error("--format, --gzip and --resume need --output")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    seat_aware = args.seats or args.section_capacity is not None or args.seat_store
+    if seat_aware and args.workers != 1:
+        parser.error("--seats needs --workers 1")
+    if seat_aware and args.resume and not args.seat_store:
+        parser.error("--resume with --seats needs the --seat-store of the interrupted run")
+
+    profile = EngineProfile() if args.profile else None
+    seats = seat_store = None
+    if seat_aware:
+        courses_df, catalog = load_catalog(args.catalog)
+        seat_store = SeatStore(args.seat_store) if args.seat_store else None
+        # Reservations are made in priority order, so no seats need holding back
+        seats = SeatLedger(section_capacities(courses_df, args.section_capacity), {}, store=seat_store)
+        students = priority_order(args.students, catalog)
+    else:
+        students = read_students(args.students)
+    export = None
+    if args.output:
+        export = ResultExport(args.output, args.format, True if args.gzip else None, args.explanations, args.resume,
+                              args.checkpoint_every)
+        students = itertools.islice(students, export.written, None)
+    if seats is not None:
+        reserve_retakes(itertools.islice(priority_order(args.students, catalog), export.written if export else 0, None),
+                        courses_df, seats, args.engine, catalog, args.selection)
+    if args.workers == 1:
+        if seats is None:
+            courses_df, catalog = load_catalog(args.catalog)
+        cache = RecommendationCache(args.cache_size, args.cache_db) if args.cache_size and seats is None else None
+        results = recommend_batch(students, courses_df, args.engine, cache, catalog, args.selection, profile,
+                                  args.run_size, seats)
+    elif args.catalog.endswith(SNAPSHOT_SUFFIX):
+        results = recommend_parallel(students, None, args.workers or None, args.chunk_size, args.engine,
+                                     args.cache_size, args.cache_db, args.catalog, args.selection, args.run_size)
+    else:
+        results = recommend_parallel(students, load_catalog(args.catalog)[0], args.workers or None, args.chunk_size,
+                                     args.engine, args.cache_size, args.cache_db, selection=args.selection,
+                                     run_size=args.run_size)
+    results = (result_json(result, args.explanations) for result in results)
+    if export is not None:
+        with export:
+            export.write_all(results)
+    else:
+        write_jsonl(results, sys.stdout)
+    if profile is not None:
+        profile.dump(args.profile)
+        print(profile.report(), file=sys.stderr)
+    if seats is not None:
+        print(seats.report(), file=sys.stderr)
+    if seat_store is not None:
+        seat_store.close()
+
+
+if __name__ == "__main__":
+    main()
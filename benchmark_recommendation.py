@@ -0,0 +1,200 @@
+# benchmark_recommendation.py
+# Benchmarks for the recommendation pipeline on synthetic catalogs.
+#
+#   python benchmark_recommendation.py --sizes 50 500 5000 --students 30 -o benchmark_results.json
+#   python benchmark_recommendation.py --baseline benchmark_results.json   # compare against an earlier run
+#
+# Stages: catalog load (load_courses from the CSV and from a binary snapshot),
+# Course fact declaration, Student fact declaration, engine.run(), the
+# post-run explanation passes, and the whole per-student run end to end. Each
+# stage reports p50/p95 latency and throughput; peak memory is measured with
+# tracemalloc in a separate pass so tracing does not skew the timings.
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from catalog_snapshot import write_snapshot
+from course_catalog import load_courses, course_fact_fields, compile_catalog
+from fast_engine import random_students
+from recommendation_pipeline import (ENGINES, create_engine, normalize_student, declare_student,
+                                     explain_unavailable_courses, run_engine)
+
+TRACK_PREFIXES = ['CSE'] * 6 + ['AIE', 'MAT', 'UC', 'UE', 'E']
+
+
+def synthetic_catalog(size, seed=0):
+    """A catalog of ``size`` courses shaped like the real one.
+
+    Prerequisites only point at earlier courses of the same or a lower year,
+    so the prerequisite graph is acyclic.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        year = 1 + i * 4 // size
+        code = f"{rng.choice(TRACK_PREFIXES)}{i:04d}"
+        earlier = [row['Course Code'] for row in rows[-60:] if row['Year'] <= year]
+        prereqs = ''
+        if year == 4 and rng.random() < 0.03:
+            prereqs = "SENIOR STANDING"
+        elif earlier and rng.random() < 0.6:
+            prereqs = ' AND '.join(rng.sample(earlier, min(len(earlier), rng.randint(1, 2))))
+        rows.append({
+            'Course Code': code,
+            'Course Name': f"Course {i}",
+            'Description': "Synthetic course",
+            'Prerequisites': prereqs,
+            'Co-requisites': rng.choice(earlier) if earlier and rng.random() < 0.05 else '',
+            'Credit Hours': rng.choice([2, 3, 3, 3, 4]),
+            'Semester Offered': rng.choice(['Fall', 'Spring']),
+            'Year': year
+        })
+    return pd.DataFrame(rows)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples):
+    total = sum(samples)
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'mean_ms': total / len(samples) * 1000,
+        'throughput_per_s': len(samples) / total if total else None
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def benchmark_catalog(courses_df, students, engine_kind, repeats=5):
+    stages = {name: [] for name in ['load_courses', 'load_snapshot', 'declare_courses', 'declare_student', 'run', 'explain', 'end_to_end']}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.csv')
+        courses_df.to_csv(path, index=False)
+        snapshot_path = os.path.join(tmp, 'catalog.snapshot')
+        write_snapshot(courses_df, snapshot_path)
+        for _ in range(repeats):
+            elapsed, courses_df = timed(load_courses, path)
+            stages['load_courses'].append(elapsed)
+            elapsed, _ = timed(load_courses, snapshot_path)
+            stages['load_snapshot'].append(elapsed)
+
+    catalog = compile_catalog(courses_df)
+    course_facts = course_fact_fields(courses_df)
+    for _ in range(repeats):
+        engine = create_engine(courses_df, catalog, engine_kind)
+        elapsed, _ = timed(engine.declare_courses, course_facts)
+        stages['declare_courses'].append(elapsed)
+
+    students = [normalize_student(record) for record in students]
+    for student in students:
+        start = time.perf_counter()
+        elapsed, transcript = timed(declare_student, engine, courses_df, student, course_facts)
+        stages['declare_student'].append(elapsed)
+        elapsed, _ = timed(engine.run)
+        stages['run'].append(elapsed)
+        elapsed, _ = timed(explain_unavailable_courses, engine, student['completed_courses'],
+                           student['failed_courses'], student['semester'], student['year'], transcript)
+        stages['explain'].append(elapsed)
+        stages['end_to_end'].append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    engine = create_engine(courses_df, catalog, engine_kind)
+    for student in students[:20]:
+        run_engine(courses_df, student, course_facts, engine)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {name: summarize(samples) for name, samples in stages.items()}, peak_memory
+
+
+def run_benchmarks(sizes, student_count, engine_kinds, seed=0):
+    results = []
+    for size in sizes:
+        courses_df = synthetic_catalog(size, seed)
+        students = random_students(courses_df, student_count, seed)
+        for engine_kind in engine_kinds:
+            stages, peak_memory = benchmark_catalog(courses_df, students, engine_kind)
+            results.append({
+                'catalog_size': size,
+                'engine': engine_kind,
+                'students': student_count,
+                'stages': stages,
+                'peak_memory_bytes': peak_memory
+            })
+            print(f"{size:>6} courses  {engine_kind:<8} end-to-end p50 {stages['end_to_end']['p50_ms']:9.2f} ms  "
+                  f"p95 {stages['end_to_end']['p95_ms']:9.2f} ms  "
+                  f"{stages['end_to_end']['throughput_per_s']:9.1f} students/s  "
+                  f"peak {peak_memory / 1e6:7.1f} MB", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print per-stage p50 slowdowns against a previous results file; return them."""
+    previous = {(r['catalog_size'], r['engine']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['catalog_size'], result['engine']))
+        if before is None:
+            continue
+        for stage, summary in result['stages'].items():
+            old = before['stages'].get(stage, {}).get('p50_ms')
+            if old:
+                ratio = summary['p50_ms'] / old
+                if ratio > 1 + threshold:
+                    regressions.append((result['catalog_size'], result['engine'], stage, ratio))
+    for size, engine_kind, stage, ratio in regressions:
+        print(f"REGRESSION {size} courses {engine_kind} {stage}: p50 x{ratio:.2f}", file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 5000], help="Synthetic catalog sizes")
+    parser.add_argument('--students', type=int, default=30, help="Synthetic transcripts per catalog")
+    parser.add_argument('--engine', choices=list(ENGINES), nargs='+', default=list(ENGINES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed p50 slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    results = run_benchmarks(args.sizes, args.students, args.engine, args.seed)
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    if baseline is not None and compare(results, baseline, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# catalog_snapshot.py
+# Compiled binary snapshot of the course catalog, loaded with mmap instead of
+# parsing CSV. The CSV stays the editable source:
+#
+#   python catalog_snapshot.py import Corrected_CSE_Courses3ver2.csv catalog.snapshot
+#   python catalog_snapshot.py export catalog.snapshot catalog.csv
+#   python catalog_snapshot.py info catalog.snapshot
+#
+# Layout: 8-byte magic, 8-byte header length, a JSON header describing every
+# array (dtype, offset from the data section, length), then the arrays
+# themselves, 8-byte aligned:
+#
+#   strings.offsets / strings.data   interned UTF-8 string table (offsets in
+#                                    characters of the decoded text)
+#   column.<name>                    int32 string ids (-1 = missing) or the
+#                                    column's own numeric dtype
+#   prereq.offsets / prereq.indices  prerequisite course ids in CSR form,
+#   prereq.unknown                   plus a flag for unresolved codes
+#   coreq.*                          the same for co-requisites
+#
+# Arrays are views into the read-only mapping, so processes opening the same
+# file share one physical copy of it through the page cache. That covers the
+# requisite arrays and the numeric DataFrame columns (to_dataframe wraps them
+# without copying); string columns, the CatalogIndex and Course fact fields
+# are Python objects that every process still builds for itself.
+import argparse
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from course_catalog import SNAPSHOT_SUFFIX, CatalogIndex, load_courses
+
+MAGIC = b'CATSNAP1'
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+
+def intern_string(strings, value):
+    if not isinstance(value, str):
+        if pd.isna(value):
+            return -1
+        value = str(value)
+    return strings.setdefault(value, len(strings))
+
+
+def csr(rows, dtype=np.int32):
+    offsets = np.zeros(len(rows) + 1, dtype=dtype)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.array([i for row in rows for i in row], dtype=dtype)
+    return offsets, indices
+
+
+def snapshot_arrays(courses_df):
+    """(array name -> array, column descriptions, CatalogIndex) for a snapshot of ``courses_df``."""
+    catalog = CatalogIndex(courses_df)
+    catalog.check_acyclic()
+    strings = {}
+    arrays = {}
+    columns = []
+    for name in courses_df.columns:
+        values = courses_df[name]
+        if is_numeric_dtype(values):
+            arrays['column.' + name] = np.asarray(values)
+            columns.append({'name': name, 'kind': 'number'})
+        else:
+            arrays['column.' + name] = np.array([intern_string(strings, value) for value in values], dtype=np.int32)
+            columns.append({'name': name, 'kind': 'string'})
+    # Offsets count characters, so the table decodes with one call and slices
+    arrays['strings.offsets'] = np.zeros(len(strings) + 1, dtype=np.int64)
+    arrays['strings.offsets'][1:] = np.cumsum([len(value) for value in strings])
+    arrays['strings.data'] = np.frombuffer(''.join(strings).encode('utf-8'), dtype=np.uint8)
+    for kind, ids, masks in (('prereq', catalog.prereq_ids, catalog.prereq_masks),
+                             ('coreq', catalog.coreq_ids, catalog.coreq_masks)):
+        arrays[kind + '.offsets'], arrays[kind + '.indices'] = csr(ids)
+        arrays[kind + '.unknown'] = np.array([bool(mask & catalog.unknown_bit) for mask in masks], dtype=np.uint8)
+    return arrays, columns, catalog
+
+
+def aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(courses_df, path):
+    """Write ``courses_df`` as a snapshot; the file is replaced atomically."""
+    arrays, columns, catalog = snapshot_arrays(courses_df)
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'length': len(array), 'offset': offset}
+        offset = aligned(offset + array.nbytes)
+    header = {'format': FORMAT_VERSION, 'rows': len(courses_df), 'fingerprint': catalog.fingerprint,
+              'columns': columns, 'arrays': layout}
+    encoded = json.dumps(header).encode('utf-8')
+    start = aligned(len(MAGIC) + 8 + len(encoded))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, 'little'))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.write(b'\0' * (start + layout[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return header
+
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file through mmap; nothing is parsed
+    until a column is asked for."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a catalog snapshot.")
+        header_size = int.from_bytes(self.buffer[len(MAGIC):len(MAGIC) + 8], 'little')
+        self.header = json.loads(self.buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_size])
+        if self.header['format'] != FORMAT_VERSION:
+            self.buffer.close()
+            raise ValueError(f"Unsupported catalog snapshot format {self.header['format']}.")
+        start = aligned(len(MAGIC) + 8 + header_size)
+        self.arrays = {name: np.frombuffer(self.buffer, dtype=spec['dtype'], count=spec['length'], offset=start + spec['offset'])
+                       for name, spec in self.header['arrays'].items()}
+        self.columns = {column['name']: column for column in self.header['columns']}
+        self.string_table = None
+
+    def __len__(self):
+        return self.header['rows']
+
+    def strings(self):
+        """The interned string table, decoded on first use."""
+        if self.string_table is None:
+            text = self.arrays['strings.data'].tobytes().decode('utf-8')
+            offsets = self.arrays['strings.offsets'].tolist()
+            self.string_table = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return self.string_table
+
+    def column(self, name):
+        """A numeric column as a zero-copy array, a string column as an object array."""
+        values = self.arrays['column.' + name]
+        if self.columns[name]['kind'] == 'number':
+            return values
+        # Id -1 picks the trailing NaN, as read_csv gives for an empty cell
+        strings = np.array(self.strings() + [np.nan], dtype=object)
+        return strings[values]
+
+    def requisites(self, kind, cid):
+        """Course ids required by course ``cid``; ``kind`` is 'prereq' or 'coreq'."""
+        offsets = self.arrays[kind + '.offsets']
+        return self.arrays[kind + '.indices'][offsets[cid]:offsets[cid + 1]]
+
+    def to_dataframe(self):
+        """The catalog as a DataFrame whose numeric columns are read-only
+        views of the mapping; the string columns are decoded into objects."""
+        df = pd.DataFrame({name: pd.Series(self.column(name), copy=False) if column['kind'] == 'number'
+                           else self.column(name) for name, column in self.columns.items()}, copy=False)
+        df['Prerequisites'] = df['Prerequisites'].fillna('')
+        df['Co-requisites'] = df['Co-requisites'].fillna('')
+        return df
+
+    def catalog_index(self, courses_df=None):
+        """CatalogIndex built from the stored CSR requisites, without parsing
+        requisite text."""
+        if courses_df is None:
+            courses_df = self.to_dataframe()
+        compiled = []
+        for kind in ('prereq', 'coreq'):
+            offsets = self.arrays[kind + '.offsets'].tolist()
+            indices = self.arrays[kind + '.indices'].tolist()
+            unknown = self.arrays[kind + '.unknown'].tolist()
+            compiled.append([(tuple(indices[start:end]), bool(flag))
+                             for start, end, flag in zip(offsets, offsets[1:], unknown)])
+        rows = [prereqs + coreqs for prereqs, coreqs in zip(*compiled)]
+        return CatalogIndex(courses_df, compiled=rows)
+
+    def close(self):
+        """Drop the arrays and unmap the file. While a DataFrame from
+        to_dataframe() still uses the mapping it stays open, and is freed
+        with the last view of it."""
+        self.arrays = {}
+        self.string_table = None
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass
+
+
+def load_catalog(path):
+    """(courses_df, CatalogIndex) from a catalog CSV or snapshot; raises
+    CatalogCycleError if the prerequisites form a cycle."""
+    if path.endswith(SNAPSHOT_SUFFIX):
+        snapshot = CatalogSnapshot(path)
+        courses_df = snapshot.to_dataframe()
+        catalog = snapshot.catalog_index(courses_df)
+    else:
+        courses_df = load_courses(path)
+        catalog = CatalogIndex(courses_df)
+    catalog.check_acyclic()
+    return courses_df, catalog
+
+
+def import_csv(csv_path, snapshot_path):
+    return write_snapshot(load_courses(csv_path), snapshot_path)
+
+
+def export_csv(snapshot_path, csv_path):
+    CatalogSnapshot(snapshot_path).to_dataframe().to_csv(csv_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the course catalog between CSV and binary snapshots.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help="Compile a catalog CSV into a snapshot")
+    command.add_argument('csv')
+    command.add_argument('snapshot')
+    command = commands.add_parser('export', help="Write a snapshot back out as CSV")
+    command.add_argument('snapshot')
+    command.add_argument('csv')
+    command = commands.add_parser('info', help="Show a snapshot's header")
+    command.add_argument('snapshot')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        header = import_csv(args.csv, args.snapshot)
+        print(f"{args.snapshot}: {header['rows']} courses, fingerprint {header['fingerprint']}")
+    elif args.command == 'export':
+        export_csv(args.snapshot, args.csv)
+    else:
+        snapshot = CatalogSnapshot(args.snapshot)
+        header = dict(snapshot.header, size=os.path.getsize(args.snapshot))
+        print(json.dumps(header, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
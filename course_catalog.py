@@ -0,0 +1,474 @@
+# course_catalog.py
+# Headless access to the course catalog (no Streamlit calls), shared by the
+# batch tools and the Streamlit app.
+import copy
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+CATALOG_FILE = "Corrected_CSE_Courses3ver2.csv"
+REQUIRED_COLUMNS = ['Course Code', 'Course Name', 'Credit Hours', 'Semester Offered', 'Year', 'Prerequisites', 'Co-requisites']
+# Optional: number of sections (default 1) and seats per section; a course
+# without a capacity has unlimited seats (see section_capacities)
+SEAT_COLUMNS = ['Sections', 'Section Capacity']
+SENIOR_PROJECTS = ['CSE493', 'CSE494']
+SNAPSHOT_SUFFIX = '.snapshot'
+# Per-course CatalogIndex columns besides the code and the compiled requisites
+ROW_COLUMNS = ['prerequisites', 'corequisites', 'senior_standing', 'credits', 'semesters', 'year_values']
+
+
+def load_courses(path=CATALOG_FILE):
+    """Load and clean the catalog CSV the same way load_data() does.
+
+    A ``.snapshot`` path is read from a binary catalog snapshot instead.
+    """
+    if path.endswith(SNAPSHOT_SUFFIX):
+        # Imported here: catalog_snapshot itself imports this module
+        from catalog_snapshot import CatalogSnapshot
+        return CatalogSnapshot(path).to_dataframe()
+    df = pd.read_csv(path)
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError("CSV file is missing required columns.")
+    df['Prerequisites'] = df['Prerequisites'].fillna('')
+    df['Co-requisites'] = df['Co-requisites'].fillna('')
+    return df
+
+
+def course_track(course_code):
+    track = 'CS' if course_code.startswith('CSE') and course_code not in SENIOR_PROJECTS else 'AI' if course_code.startswith('AIE') else 'Elective'
+    if course_code.startswith('UC') or course_code.startswith('UE'):
+        track = 'University'
+    return track
+
+
+def course_fact(cid, row):
+    """Course fact fields for one catalog row (a dict of catalog columns)."""
+    return {
+        'course_id': row['Course Code'],
+        'cid': cid,
+        'credits': float(row['Credit Hours']),
+        'prerequisites': row['Prerequisites'],
+        'corequisites': row['Co-requisites'],
+        'semester': row['Semester Offered'].strip(),
+        'track': course_track(row['Course Code']),
+        'year': int(row['Year'])
+    }
+
+
+def course_fact_fields(courses_df):
+    """Parse every catalog row into Course fact fields once, in catalog order.
+
+    ``cid`` is the row position, i.e. the course id used by CatalogIndex.
+    """
+    return [course_fact(cid, row) for cid, row in enumerate(courses_df.to_dict('records'))]
+
+
+def section_capacities(courses_df, default_capacity=None):
+    """Course code -> seats of each of its sections, from the SEAT_COLUMNS.
+
+    ``default_capacity`` seats per section apply to courses without a
+    Section Capacity; courses left out have unlimited seats.
+    """
+    capacities = {}
+    for row in courses_df.to_dict('records'):
+        capacity = row.get('Section Capacity')
+        if capacity is None or pd.isna(capacity):
+            capacity = default_capacity
+        if capacity is None:
+            continue
+        sections = row.get('Sections')
+        sections = 1 if sections is None or pd.isna(sections) else int(sections)
+        capacities[row['Course Code']] = [int(capacity)] * sections
+    return capacities
+
+
+class CatalogCycleError(ValueError):
+    """The catalog's prerequisites form a cycle, so none of the courses on it
+    could ever be taken. ``cycle`` lists the codes, each one a prerequisite
+    of the next, ending where it starts."""
+
+    def __init__(self, cycle):
+        super().__init__(f"Prerequisites form a cycle: {' -> '.join(cycle)}")
+        self.cycle = cycle
+
+
+def split_requisites(text, separators=(' AND ', ',')):
+    """'CSE014 AND CSE132' -> ['CSE014', 'CSE132']; empty text -> []."""
+    if not text:
+        return []
+    for separator in separators[:-1]:
+        text = text.replace(separator, separators[-1])
+    return [code.strip() for code in text.split(separators[-1])]
+
+
+class CatalogIndex:
+    """Catalog compiled once for eligibility checks on integers.
+
+    Course codes map to ids in catalog order; prerequisites and co-requisites
+    are kept as id tuples and as bitmasks (bit i = course id i). A requisite
+    that names no catalog course sets the extra ``unknown_bit``, which no
+    student mask ever has, so it can never be satisfied.
+
+    The prerequisite graph is also kept in closed form (see compile_graph),
+    so "what does X lead to" and "what does X need" are single lookups.
+
+    An index is not modified once built: with_course_added / _updated /
+    _removed return a new index that recompiles only the affected rows.
+    """
+
+    def __init__(self, courses_df, compiled=None):
+        """``compiled`` optionally supplies already resolved requisites, one
+        (prereq ids, prereq unknown, coreq ids, coreq unknown) tuple per row
+        (see CatalogSnapshot.catalog_index), instead of parsing the text."""
+        self.codes = courses_df['Course Code'].tolist()
+        self.ids = {}
+        for i, code in enumerate(self.codes):
+            self.ids.setdefault(code, i)
+        self.unknown_bit = 1 << len(self.codes)
+        self.prerequisites = courses_df['Prerequisites'].tolist()
+        self.corequisites = courses_df['Co-requisites'].tolist()
+        self.senior_standing = [prereqs == "SENIOR STANDING" for prereqs in self.prerequisites]
+        self.credits = [float(credits) for credits in courses_df['Credit Hours'].tolist()]
+        self.semesters = courses_df['Semester Offered'].tolist()
+        self.year_values = courses_df['Year'].tolist()
+        self.prereq_ids = [()] * len(self.codes)
+        self.prereq_masks = [0] * len(self.codes)
+        self.coreq_ids = [()] * len(self.codes)
+        self.coreq_masks = [0] * len(self.codes)
+        for i in range(len(self.codes)):
+            if compiled is None:
+                self.compile_row(i)
+            else:
+                self.set_compiled(i, *compiled[i])
+        self.refresh()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def compile_requisites(self, text, separators=(' AND ', ',')):
+        """Requisite text -> (id tuple, bitmask) against this catalog."""
+        codes = split_requisites(text, separators)
+        ids = tuple(self.ids[code] for code in codes if code in self.ids)
+        mask = self.mask(codes)
+        if len(ids) < len(codes):
+            mask |= self.unknown_bit
+        return ids, mask
+
+    def mask(self, codes):
+        """Bitmask of the given course codes (codes not in the catalog are ignored)."""
+        mask = 0
+        for code in codes:
+            idx = self.ids.get(code)
+            if idx is not None:
+                mask |= 1 << idx
+        return mask
+
+    def mask_array(self, mask):
+        """Boolean array over course ids, True where ``mask`` has the bit set."""
+        size = len(self.codes)
+        mask &= self.unknown_bit - 1
+        bits = np.frombuffer(mask.to_bytes(size // 8 + 1, 'little'), dtype=np.uint8)
+        return np.unpackbits(bits, bitorder='little')[:size].astype(bool)
+
+    def ids_of(self, mask):
+        mask &= self.unknown_bit - 1
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def codes_of(self, mask):
+        return [self.codes[i] for i in self.ids_of(mask)]
+
+    def credits_of(self, mask):
+        return sum(self.credits[i] for i in self.ids_of(mask))
+
+    def compile_row(self, i):
+        prereqs = self.prerequisites[i] if not self.senior_standing[i] else ''
+        self.prereq_ids[i], self.prereq_masks[i] = self.compile_requisites(prereqs)
+        self.coreq_ids[i], self.coreq_masks[i] = self.compile_requisites(self.corequisites[i], separators=(',',))
+
+    def set_compiled(self, i, prereq_ids, prereq_unknown, coreq_ids, coreq_unknown):
+        self.prereq_ids[i] = prereq_ids
+        self.prereq_masks[i] = self.unknown_bit if prereq_unknown else 0
+        for j in prereq_ids:
+            self.prereq_masks[i] |= 1 << j
+        self.coreq_ids[i] = coreq_ids
+        self.coreq_masks[i] = self.unknown_bit if coreq_unknown else 0
+        for j in coreq_ids:
+            self.coreq_masks[i] |= 1 << j
+
+    def refresh(self):
+        """Rebuild the derived whole-catalog columns after the rows changed."""
+        self.credit_hours = dict(zip(self.codes, self.credits))
+        # Column arrays for whole-catalog filters (see explain_unavailable_courses)
+        self.semester_keys = np.array([semester.lower() for semester in self.semesters])
+        self.years = np.asarray(self.year_values)
+        # Identifies the catalog content the engine sees; any admin edit to
+        # these columns yields a new fingerprint (used as a cache version)
+        content = repr((self.codes, self.prerequisites, self.corequisites, self.credits,
+                        self.semesters, self.years.tolist()))
+        self.fingerprint = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+        self.compile_graph()
+
+    def compile_graph(self):
+        """Closed form of the prerequisite graph, as per-course lists:
+
+        dependent_masks    courses that list it as a prerequisite
+        prereq_closure     every course it needs, directly or indirectly
+        dependent_closure  every course that needs it, directly or indirectly
+        unlock_counts      the size of dependent_closure
+        heights            courses on the longest chain it starts (itself included)
+
+        plus ``order``, the course ids with every prerequisite before its
+        dependents, and ``cyclic``, the mask of courses on or behind a
+        prerequisite cycle; those are left out of ``order`` and have height 0.
+        """
+        n = len(self.codes)
+        dependents = [[] for _ in range(n)]
+        waiting = [0] * n
+        for i in range(n):
+            for p in set(self.prereq_ids[i]):
+                dependents[p].append(i)
+                waiting[i] += 1
+        order = [i for i in range(n) if not waiting[i]]
+        for i in order:
+            for d in dependents[i]:
+                waiting[d] -= 1
+                if not waiting[d]:
+                    order.append(d)
+        self.order = order
+        self.cyclic = self.unknown_bit - 1
+        for i in order:
+            self.cyclic ^= 1 << i
+        self.dependent_masks = [0] * n
+        for i in range(n):
+            for d in dependents[i]:
+                self.dependent_masks[i] |= 1 << d
+        self.prereq_closure = [0] * n
+        self.dependent_closure = [0] * n
+        # Courses on a cycle reach each other; close them by search instead
+        for i in self.ids_of(self.cyclic):
+            self.prereq_closure[i] = self.reachable(i, lambda j: self.prereq_masks[j] & (self.unknown_bit - 1))
+            self.dependent_closure[i] = self.reachable(i, self.dependent_masks.__getitem__)
+        for i in order:
+            for p in self.prereq_ids[i]:
+                self.prereq_closure[i] |= self.prereq_closure[p] | 1 << p
+        self.heights = [0] * n
+        for i in reversed(order):
+            for d in dependents[i]:
+                self.dependent_closure[i] |= self.dependent_closure[d] | 1 << d
+                self.heights[i] = max(self.heights[i], self.heights[d])
+            self.heights[i] += 1
+        self.unlock_counts = [bin(mask).count('1') for mask in self.dependent_closure]
+
+    def reachable(self, start, edges):
+        """Mask of the courses reachable from ``start`` through ``edges`` (id -> mask)."""
+        seen = 0
+        pending = edges(start)
+        while pending:
+            low = pending & -pending
+            pending ^= low
+            if not seen & low:
+                seen |= low
+                pending |= edges(low.bit_length() - 1) & ~seen
+        return seen
+
+    def unlocked_by(self, cid, completed=0):
+        """Courses whose prerequisites are all met once course ``cid`` is
+        completed on top of the ``completed`` mask (and were not before)."""
+        done = completed | 1 << cid
+        unlocked = 0
+        for d in self.ids_of(self.dependent_masks[cid] & ~done):
+            if not self.prereq_masks[d] & ~done:
+                unlocked |= 1 << d
+        return unlocked
+
+    def find_cycle(self):
+        """Course codes of one prerequisite cycle, [] if there is none."""
+        if not self.cyclic:
+            return []
+        # Walking prerequisites inside the cyclic set must come back around
+        i = next(self.ids_of(self.cyclic))
+        path = []
+        position = {}
+        while i not in position:
+            position[i] = len(path)
+            path.append(i)
+            i = next(self.ids_of(self.prereq_masks[i] & self.cyclic))
+        cycle = path[position[i]:] + [i]
+        # Listed from prerequisite to dependent
+        return [self.codes[j] for j in reversed(cycle)]
+
+    def check_acyclic(self):
+        """Raise CatalogCycleError if the prerequisites form a cycle."""
+        if self.cyclic:
+            raise CatalogCycleError(self.find_cycle())
+
+    def copy(self):
+        index = copy.copy(self)
+        for name in ROW_COLUMNS + ['codes', 'prereq_ids', 'prereq_masks', 'coreq_ids', 'coreq_masks']:
+            setattr(index, name, list(getattr(self, name)))
+        index.ids = dict(self.ids)
+        return index
+
+    def set_row(self, i, row):
+        self.prerequisites[i] = row['Prerequisites'] or ''
+        self.corequisites[i] = row['Co-requisites'] or ''
+        self.senior_standing[i] = self.prerequisites[i] == "SENIOR STANDING"
+        self.credits[i] = float(row['Credit Hours'])
+        self.semesters[i] = row['Semester Offered']
+        self.year_values[i] = row['Year']
+
+    def with_course_updated(self, position, row):
+        """New index with the course at ``position`` recompiled from ``row``.
+
+        Other courses refer to it by id, which does not change, so only this
+        row is recompiled. The course code itself must stay the same.
+        """
+        if row['Course Code'] != self.codes[position]:
+            raise ValueError("Course code cannot be changed by an edit.")
+        index = self.copy()
+        index.set_row(position, row)
+        index.compile_row(position)
+        index.refresh()
+        return index
+
+    def with_course_added(self, row):
+        """New index with ``row`` appended as the last course id.
+
+        The unknown bit moves up one place; only courses that had an
+        unresolved requisite are recompiled, since the new code may resolve it.
+        """
+        index = self.copy()
+        position = len(index.codes)
+        index.codes.append(row['Course Code'])
+        index.ids.setdefault(row['Course Code'], position)
+        for name in ROW_COLUMNS + ['prereq_ids', 'prereq_masks', 'coreq_ids', 'coreq_masks']:
+            getattr(index, name).append(None)
+        index.set_row(position, row)
+        index.unknown_bit = self.unknown_bit << 1
+        for i in range(position):
+            if (index.prereq_masks[i] | index.coreq_masks[i]) & self.unknown_bit:
+                index.compile_row(i)
+        index.compile_row(position)
+        index.refresh()
+        return index
+
+    def with_course_removed(self, position):
+        """New index without the course at ``position``.
+
+        Later ids shift down by one, so every mask drops that bit; courses that
+        required the removed course are recompiled (normally leaving their
+        requisite unresolved).
+        """
+        index = self.copy()
+        for name in ROW_COLUMNS + ['codes', 'prereq_ids', 'prereq_masks', 'coreq_ids', 'coreq_masks']:
+            del getattr(index, name)[position]
+        index.ids = {}
+        for i, code in enumerate(index.codes):
+            index.ids.setdefault(code, i)
+        index.unknown_bit = self.unknown_bit >> 1
+        bit = 1 << position
+        low = bit - 1
+        for i in range(len(index.codes)):
+            if (index.prereq_masks[i] | index.coreq_masks[i]) & bit:
+                index.compile_row(i)
+                continue
+            index.prereq_masks[i] = index.prereq_masks[i] & low | index.prereq_masks[i] >> position + 1 << position
+            index.coreq_masks[i] = index.coreq_masks[i] & low | index.coreq_masks[i] >> position + 1 << position
+            index.prereq_ids[i] = tuple(j - (j > position) for j in index.prereq_ids[i])
+            index.coreq_ids[i] = tuple(j - (j > position) for j in index.coreq_ids[i])
+        index.refresh()
+        return index
+
+def compile_catalog(courses_df):
+    return CatalogIndex(courses_df)
+
+
+CatalogChange = namedtuple('CatalogChange', ['version', 'action', 'course_code', 'position', 'before', 'after',
+                                             'fingerprint_before', 'fingerprint_after'])
+
+
+class CatalogStore:
+    """The editable catalog: a DataFrame plus its compiled index and Course
+    fact fields, kept up to date one add/edit/delete at a time.
+
+    Every change bumps ``version`` and is appended to ``changes``; engines
+    (sync_catalog) and result caches (RecommendationCache.sync) replay
+    changes_since() their last version instead of rebuilding from scratch.
+    The frame, index and fact list are replaced, not mutated, so anything
+    still holding the previous ones stays self-consistent. A catalog whose
+    prerequisites form a cycle, or a change that would create one, is
+    rejected with CatalogCycleError.
+    """
+
+    def __init__(self, courses_df):
+        self.courses_df = courses_df.reset_index(drop=True)
+        self.catalog = CatalogIndex(self.courses_df)
+        self.catalog.check_acyclic()
+        self.course_facts = course_fact_fields(self.courses_df)
+        self.version = 0
+        self.changes = []
+
+    def position_of(self, course_code):
+        position = self.catalog.ids.get(course_code)
+        if position is None:
+            raise ValueError(f"Course not found: {course_code}")
+        return position
+
+    def row(self, position):
+        return self.courses_df.iloc[position].to_dict()
+
+    def changes_since(self, version):
+        return [change for change in self.changes if change.version > version]
+
+    def record(self, action, course_code, position, before, after, catalog, course_facts):
+        fingerprint_before = self.catalog.fingerprint
+        self.catalog = catalog
+        self.course_facts = course_facts
+        self.version += 1
+        self.changes.append(CatalogChange(self.version, action, course_code, position, before, after,
+                                          fingerprint_before, catalog.fingerprint))
+        return self.version
+
+    def add_course(self, row):
+        row = dict(row)
+        row['Prerequisites'] = row.get('Prerequisites') or ''
+        row['Co-requisites'] = row.get('Co-requisites') or ''
+        if row['Course Code'] in self.catalog.ids:
+            raise ValueError("Course already exists")
+        catalog = self.catalog.with_course_added(row)
+        catalog.check_acyclic()
+        position = len(self.courses_df)
+        self.courses_df = pd.concat([self.courses_df, pd.DataFrame([row])], ignore_index=True)
+        course_facts = self.course_facts + [course_fact(position, row)]
+        return self.record('add', row['Course Code'], position, None, row, catalog, course_facts)
+
+    def edit_course(self, course_code, fields):
+        """Update some columns of one course; the course code cannot change."""
+        position = self.position_of(course_code)
+        before = self.row(position)
+        after = dict(before, **fields)
+        after['Prerequisites'] = after['Prerequisites'] or ''
+        after['Co-requisites'] = after['Co-requisites'] or ''
+        catalog = self.catalog.with_course_updated(position, after)
+        catalog.check_acyclic()
+        courses_df = self.courses_df.copy()
+        courses_df.loc[position, list(after)] = list(after.values())
+        self.courses_df = courses_df
+        course_facts = list(self.course_facts)
+        course_facts[position] = course_fact(position, after)
+        return self.record('edit', course_code, position, before, after, catalog, course_facts)
+
+    def delete_course(self, course_code):
+        position = self.position_of(course_code)
+        before = self.row(position)
+        self.courses_df = self.courses_df.drop(index=position).reset_index(drop=True)
+        # Later courses move down one id
+        course_facts = self.course_facts[:position] + [dict(fields, cid=cid) for cid, fields in
+                                                       enumerate(self.course_facts[position + 1:], position)]
+        return self.record('delete', course_code, position, before, None,
+                           self.catalog.with_course_removed(position), course_facts)
@@ -0,0 +1,116 @@
+# course_selection.py
+# How the courses that pass the requisite checks share the credit cap.
+#
+#   greedy    each course takes its credits as its rule fires (salience order:
+#             failed retakes, core CS, the rest); the first ones that fit win
+#   knapsack  the eligible courses are collected during the run and the set
+#             with the highest total weight under the cap is chosen afterwards,
+#             by dynamic programming over credit hours
+import math
+
+SELECTIONS = ['greedy', 'knapsack']
+
+# A course's weight is the sum of these, per feature it has
+SELECTION_WEIGHTS = {
+    'failed': 1000,  # retake of a failed course
+    'core': 100,     # core CS course
+    'unlocks': 10,   # per course that needs it, directly or further down the prerequisite chain
+    'credits': 1     # per credit hour, so left-over capacity still gets used
+}
+
+# Largest group of co-requisite-linked candidates whose subsets are enumerated
+MAX_GROUP_SIZE = 12
+
+
+def course_weight(catalog, cid, credits, reason, weights=SELECTION_WEIGHTS):
+    """Weight of recommending course ``cid`` for the rule ``reason`` that matched it."""
+    return (weights['failed'] * (reason == 'failed') + weights['core'] * (reason == 'core')
+            + weights['unlocks'] * catalog.unlock_counts[cid] + weights['credits'] * credits)
+
+
+def candidate_groups(catalog, cids):
+    """Split candidate ids into groups connected by co-requisites; each group
+    is a list of (member mask, co-requisite mask within the candidates)."""
+    candidates = 0
+    for cid in cids:
+        candidates |= 1 << cid
+    requires = {cid: catalog.coreq_masks[cid] & candidates for cid in cids}
+    groups = []
+    assigned = 0
+    for cid in cids:
+        if assigned >> cid & 1:
+            continue
+        group = []
+        pending = [cid]
+        assigned |= 1 << cid
+        while pending:
+            i = pending.pop()
+            group.append(i)
+            for j in cids:
+                if not assigned >> j & 1 and (requires[i] >> j & 1 or requires[j] >> i & 1):
+                    assigned |= 1 << j
+                    pending.append(j)
+        groups.append([(1 << i, requires[i]) for i in sorted(group, key=cids.index)])
+    return groups
+
+
+def group_options(group):
+    """Masks of the ways to take part of a group: every subset that contains
+    the co-requisites of its members. Large groups only offer each member
+    together with everything it requires."""
+    if len(group) > MAX_GROUP_SIZE:
+        options = {0}
+        for bit, _ in group:
+            closed, pending = bit, bit
+            while pending:
+                pending = 0
+                for other, requires in group:
+                    if closed & other and requires & ~closed:
+                        pending |= requires & ~closed
+                closed |= pending
+            options.add(closed)
+        return sorted(options)
+    options = []
+    for subset in range(1 << len(group)):
+        chosen = 0
+        for k, (bit, _) in enumerate(group):
+            if subset >> k & 1:
+                chosen |= bit
+        if all(not chosen & bit or not requires & ~chosen for bit, requires in group):
+            options.append(chosen)
+    return options
+
+
+def knapsack_select(catalog, candidates, max_credits, weights=SELECTION_WEIGHTS):
+    """Course codes to recommend out of ``candidates`` (code -> (credits,
+    reason), in firing order): the highest-weight set within ``max_credits``
+    that keeps every chosen course's co-requisites chosen too.
+
+    Credits are rounded up to whole hours for the table, so a chosen set
+    never exceeds the cap.
+    """
+    cids = [catalog.ids[code] for code in candidates]
+    weight = {}
+    hours = {}
+    for code, cid in zip(candidates, cids):
+        credits, reason = candidates[code]
+        weight[cid] = course_weight(catalog, cid, credits, reason, weights)
+        hours[cid] = math.ceil(credits)
+    capacity = int(max_credits)
+    # best[c]: (total weight, chosen mask) of the best selection so far using at most c hours
+    best = [(0, 0)] * (capacity + 1)
+    for group in candidate_groups(catalog, cids):
+        options = []
+        for chosen in group_options(group):
+            if chosen:
+                ids = list(catalog.ids_of(chosen))
+                options.append((sum(hours[i] for i in ids), sum(weight[i] for i in ids), chosen))
+        updated = list(best)
+        for size, value, chosen in options:
+            for c in range(size, capacity + 1):
+                total = best[c - size][0] + value
+                if total > updated[c][0]:
+                    updated[c] = (total, best[c - size][1] | chosen)
+        best = updated
+    chosen = best[capacity][1]
+    return {code for code, cid in zip(candidates, cids) if chosen >> cid & 1}
@@ -0,0 +1,351 @@
+# degree_planner.py
+# Multi-semester plan to graduation under the same rules as the recommendation
+# engine: Semester Offered equal to the term (a 'Both' course matches neither,
+# as in the engines), Year <= the student's year, prerequisites, co-requisites
+# (completed or taken the same term), senior standing for "SENIOR STANDING"
+# courses and for CSE493/CSE494 when they are core CS courses
+# (EligibilityChecks.consider_course), and the CGPA credit cap.
+#
+#   python degree_planner.py --cgpa 3.1 --semester Fall --year 2 --completed MAT111,PHY211,CSE014
+#   python degree_planner.py --students students.jsonl -o plans.jsonl
+#
+# The search is A* over (completed-course bitmask, term) states. A plan's cost
+# is its number of terms; the lower bound for a state is the larger of the
+# longest remaining prerequisite chain (placed on the terms each course is
+# offered in) and the remaining credits divided by the credit cap. Each term
+# branches over the maximal sets of eligible courses that fit the cap (taking
+# more courses never makes a plan longer), and the first such set at every
+# term is the greedy plan that seeds the branch-and-bound incumbent.
+import argparse
+import heapq
+import json
+import math
+import sys
+import time
+
+from course_catalog import CATALOG_FILE, SENIOR_PROJECTS, compile_catalog, course_track, load_courses
+from inference_engine import SENIOR_STANDING_CREDITS, credit_limit_for
+from recommendation_pipeline import split_courses
+
+TERMS = ['Fall', 'Spring']
+
+
+def term_at(semester, year, t):
+    """(semester, year) of the t-th term after (semester, year); Fall starts a new year."""
+    index = TERMS.index(semester) + t
+    return TERMS[index % 2], year + index // 2
+
+
+def bits(ids):
+    mask = 0
+    for i in ids:
+        mask |= 1 << i
+    return mask
+
+
+class DegreePlanner:
+    """Plans the courses in ``required`` (default: the whole catalog) plus
+    everything they need, for any student transcript."""
+
+    def __init__(self, catalog, required=None):
+        self.catalog = catalog
+        n = len(catalog)
+        self.course_credits = catalog.credits
+        self.offered = {}
+        for term in TERMS:
+            key = term.lower()
+            self.offered[key] = bits(i for i in range(n) if catalog.semesters[i].strip().lower() == key)
+        self.course_years = catalog.years.tolist()
+        self.senior = bits(i for i in range(n) if catalog.senior_standing[i]
+                           or catalog.codes[i] in SENIOR_PROJECTS and course_track(catalog.codes[i]) == 'CS')
+        self.blocked = {}
+        for i in range(n):
+            if (catalog.prereq_masks[i] | catalog.coreq_masks[i]) & catalog.unknown_bit:
+                self.blocked[i] = "a requisite is not in the catalog"
+            elif not (self.offered['fall'] | self.offered['spring']) >> i & 1:
+                self.blocked[i] = f"no term matches its Semester Offered ({catalog.semesters[i]})"
+        for i in catalog.ids_of(catalog.cyclic):
+            self.blocked.setdefault(i, "its prerequisites form a cycle")
+        self.rank = {cid: position for position, cid in enumerate(catalog.order)}
+        self.required = self.closure(bits(range(n)) if required is None else catalog.mask(required))
+        self.height = self.chain_heights()
+        self.symmetry = self.symmetry_classes()
+
+    def closure(self, required):
+        """``required`` plus every prerequisite and co-requisite it depends on."""
+        pending = list(self.catalog.ids_of(required))
+        while pending:
+            i = pending.pop()
+            for j in self.catalog.prereq_ids[i] + self.catalog.coreq_ids[i]:
+                if not required >> j & 1:
+                    required |= 1 << j
+                    pending.append(j)
+        return required
+
+    def chain_heights(self):
+        """Longest chain of required dependents starting at each course, in
+        courses; used to take the courses that unlock the most first."""
+        height = {}
+        for i in reversed(self.catalog.order):
+            if self.required >> i & 1:
+                dependents = self.catalog.ids_of(self.catalog.dependent_masks[i] & self.required)
+                height[i] = 1 + max((height.get(d, 0) for d in dependents), default=0)
+        return height
+
+    def symmetry_classes(self):
+        """Class key per required course that nothing else depends on: two
+        such courses with the same credits, offering, Year and senior
+        restriction can swap terms in any plan, so only one order of each
+        class needs to be searched."""
+        linked = 0
+        for i in self.catalog.ids_of(self.required):
+            if self.catalog.coreq_masks[i]:
+                linked |= self.catalog.coreq_masks[i] | 1 << i
+        return {i: (self.course_credits[i], self.catalog.semester_keys[i], self.course_years[i], self.senior >> i & 1)
+                for i, height in self.height.items() if height == 1 and not linked >> i & 1}
+
+    def credits_of(self, mask):
+        return sum(self.course_credits[i] for i in self.catalog.ids_of(mask))
+
+    def first_term(self, i, t, semester, year):
+        """Earliest term >= t in which course ``i`` is offered and allowed by Year."""
+        while True:
+            term, term_year = term_at(semester, year, t)
+            if self.offered[term.lower()] >> i & 1 and self.course_years[i] <= term_year:
+                return t
+            t += 1
+
+    def lower_bound(self, completed, t, semester, year, max_credits):
+        """Admissible estimate of the total number of terms from the start."""
+        remaining = self.required & ~completed
+        if not remaining:
+            return t
+        earliest = {}
+        last = t
+        for i in sorted(self.catalog.ids_of(remaining), key=self.rank.__getitem__):
+            ready = t
+            for p in self.catalog.prereq_ids[i]:
+                if p in earliest:
+                    ready = max(ready, earliest[p] + 1)
+            earliest[i] = self.first_term(i, ready, semester, year)
+            last = max(last, earliest[i] + 1)
+        return max(last, self.credit_bound(remaining, t, semester, year, max_credits))
+
+    def credit_bound(self, remaining, t, semester, year, max_credits):
+        """Terms needed to fit the remaining credits under the cap: in total,
+        and for the courses offered in only one semester, counting only the
+        terms of that semester in or after each course's Year."""
+        bound = t + math.ceil(self.credits_of(remaining) / max_credits)
+        for term in TERMS:
+            only = remaining & self.offered[term.lower()] & ~self.offered[TERMS[1 - TERMS.index(term)].lower()]
+            by_year = {}
+            for i in self.catalog.ids_of(only):
+                by_year[self.course_years[i]] = by_year.get(self.course_years[i], 0) + self.course_credits[i]
+            credits = 0
+            for course_year in sorted(by_year, reverse=True):
+                # Credits of courses with Year >= course_year need that many
+                # terms of this semester, the first one no earlier than:
+                credits += by_year[course_year]
+                first = t
+                while term_at(semester, year, first) != (term, max(course_year, term_at(semester, year, first)[1])):
+                    first += 1
+                bound = max(bound, first + 2 * (math.ceil(credits / max_credits) - 1) + 1)
+        return bound
+
+    def term_options(self, completed, t, semester, year, max_credits, limit):
+        """Maximal sets of courses (bitmasks) that can be taken together in term
+        ``t``, best-priority first; at most ``limit`` of them. The second
+        value tells whether the list was cut short."""
+        term, term_year = term_at(semester, year, t)
+        candidates = self.required & ~completed & self.offered[term.lower()]
+        if self.credits_of(completed) < SENIOR_STANDING_CREDITS:
+            candidates &= ~self.senior
+        eligible = 0
+        for i in self.catalog.ids_of(candidates):
+            if self.course_years[i] <= term_year and not self.catalog.prereq_masks[i] & ~completed:
+                eligible |= 1 << i
+        # A course must be taken with its missing co-requisites (and theirs)
+        units = []
+        for i in self.catalog.ids_of(eligible):
+            unit = 1 << i
+            pending = unit
+            while pending:
+                j = (pending & -pending).bit_length() - 1
+                pending &= pending - 1
+                missing = self.catalog.coreq_masks[j] & ~completed & ~unit
+                unit |= missing
+                pending |= missing
+            if not unit & ~eligible:
+                units.append((unit, i))
+        units.sort(key=lambda item: (-self.height[item[1]], self.course_years[item[1]], item[1]))
+        # A unit from a symmetry class is only taken with the class's earlier units
+        previous = []
+        last_of_class = {}
+        for unit, i in units:
+            key = self.symmetry.get(i) if unit == 1 << i else None
+            previous.append(last_of_class.get(key, 0) if key is not None else 0)
+            if key is not None:
+                last_of_class[key] = unit
+        units = [unit for unit, _ in units]
+        if not units:
+            return [0], False
+        unit_credits = [self.credits_of(unit) for unit in units]
+        # Upper bound on the credits still addable from unit k on
+        upper = [0] * (len(units) + 1)
+        for k in range(len(units) - 1, -1, -1):
+            upper[k] = upper[k + 1] + unit_credits[k]
+
+        options = []
+        stack = [(0, 0, 0, -1)]
+        while stack:
+            if len(options) >= limit:
+                return options, True
+            k, chosen, credits, need = stack.pop()
+            if credits + upper[k] <= need:
+                continue
+            if k == len(units):
+                if all(not unit & ~chosen or credits + self.credits_of(unit & ~chosen) > max_credits for unit in units):
+                    options.append(chosen)
+                continue
+            extra = units[k] & ~chosen
+            if not extra:
+                stack.append((k + 1, chosen, credits, need))
+                continue
+            # Skipping a unit only yields a maximal set if it ends up not fitting
+            stack.append((k + 1, chosen, credits, max(need, max_credits - unit_credits[k])))
+            extra_credits = self.credits_of(extra)
+            if credits + extra_credits <= max_credits and not previous[k] & ~chosen:
+                stack.append((k + 1, chosen | extra, credits + extra_credits, need))
+        return options, False
+
+    def plan(self, completed_courses, cgpa, semester, year, time_limit=0.5, max_terms=20, max_options=64):
+        """Shortest plan to complete the required courses, as a dict with one
+        entry per term. ``optimal`` is False when the time limit or the
+        per-term option limit stopped the search before the plan was proven
+        shortest."""
+        start_time = time.perf_counter()
+        max_credits = credit_limit_for(cgpa)
+        completed = self.catalog.mask(completed_courses)
+        blocked = [i for i in self.blocked if self.required >> i & 1 and not completed >> i & 1]
+        result = {
+            'terms': None,
+            'term_count': None,
+            'optimal': False,
+            'lower_bound': None,
+            'max_credits': max_credits,
+            'explored': 0,
+            'explanations': [f"Cannot plan {self.catalog.codes[i]}: {self.blocked[i]}." for i in blocked]
+        }
+        if blocked:
+            return result
+
+        # Greedy plan: the first option at every term
+        best, state = [], completed
+        while state & self.required != self.required and len(best) < max_terms:
+            chosen = self.term_options(state, len(best), semester, year, max_credits, 1)[0][0]
+            best.append(chosen)
+            state |= chosen
+        if state & self.required != self.required:
+            best = None
+        best_terms = len(best) if best is not None else max_terms + 1
+
+        root_bound = self.lower_bound(completed, 0, semester, year, max_credits)
+        result['lower_bound'] = root_bound
+        proven = True
+        seen = {completed: 0}
+        counter = 0
+        heap = [(root_bound, 0, counter, completed, ())]
+        while heap:
+            bound, _, _, state, path = heapq.heappop(heap)
+            if bound >= best_terms:
+                break
+            if time.perf_counter() - start_time > time_limit:
+                proven = False
+                break
+            result['explored'] += 1
+            t = len(path)
+            options, truncated = self.term_options(state, t, semester, year, max_credits, max_options)
+            proven = proven and not truncated
+            for chosen in options:
+                child = state | chosen
+                if child & self.required == self.required:
+                    if t + 1 < best_terms:
+                        best, best_terms = list(path) + [chosen], t + 1
+                    continue
+                # Reaching the same courses no later is at least as good
+                if seen.get(child, max_terms + 1) <= t + 1:
+                    continue
+                seen[child] = t + 1
+                child_bound = self.lower_bound(child, t + 1, semester, year, max_credits)
+                if child_bound < best_terms and t + 1 < max_terms:
+                    counter += 1
+                    heapq.heappush(heap, (child_bound, -self.credits_of(child), counter, child, path + (chosen,)))
+
+        if best is None:
+            result['explanations'].append(f"No plan finishes within {max_terms} terms.")
+            return result
+        result['terms'] = []
+        for t, chosen in enumerate(best):
+            term, term_year = term_at(semester, year, t)
+            result['terms'].append({
+                'semester': term,
+                'year': term_year,
+                'courses': self.catalog.codes_of(chosen),
+                'credits': self.credits_of(chosen)
+            })
+        result['term_count'] = best_terms
+        result['optimal'] = proven or best_terms <= root_bound
+        return result
+
+
+def plan_student(planner, student, **options):
+    """Plan for a normalized student record (see normalize_student)."""
+    plan = planner.plan(student['completed_courses'], student['cgpa'], student['semester'], student['year'], **options)
+    return dict({'student_id': student['student_id']}, **plan)
+
+
+def main(argv=None):
+    # Imported here so the planner itself does not depend on the batch tools
+    from batch_recommendation import read_students, write_jsonl
+    from recommendation_pipeline import normalize_student, validate_student
+
+    parser = argparse.ArgumentParser(description="Plan the terms to graduation for a student.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot")
+    parser.add_argument('--required', help="Comma-separated courses to plan for (default: the whole catalog)")
+    parser.add_argument('--students', help="CSV or JSONL student records (instead of the options below)")
+    parser.add_argument('-o', '--output', help="Output JSONL file (default: stdout)")
+    parser.add_argument('--student-id', default='S1')
+    parser.add_argument('--cgpa', type=float, default=2.0)
+    parser.add_argument('--semester', default='Fall', choices=TERMS)
+    parser.add_argument('--year', type=int, default=1)
+    parser.add_argument('--completed', default='', help="Comma-separated completed courses")
+    parser.add_argument('--time-limit', type=float, default=0.5, help="Search time limit per student in seconds")
+    parser.add_argument('--max-terms', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    courses_df = load_courses(args.catalog)
+    catalog = compile_catalog(courses_df)
+    planner = DegreePlanner(catalog, split_courses(args.required) if args.required else None)
+    if args.students:
+        records = read_students(args.students)
+    else:
+        records = [{'student_id': args.student_id, 'cgpa': args.cgpa, 'semester': args.semester,
+                    'year': args.year, 'completed_courses': args.completed}]
+    results = []
+    for record in records:
+        student = normalize_student(record)
+        errors = validate_student(student, set(catalog.codes))
+        if errors:
+            results.append({'student_id': student['student_id'], 'errors': errors})
+        else:
+            results.append(plan_student(planner, student, time_limit=args.time_limit, max_terms=args.max_terms))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            write_jsonl(results, out)
+    else:
+        write_jsonl(results, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
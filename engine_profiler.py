@@ -0,0 +1,256 @@
+# engine_profiler.py
+# Opt-in instrumentation for the experta engine: rule activations and
+# firings, TEST evaluations, time in RETE matching versus rule bodies,
+# agenda size per step and facts declared.
+#
+#   with profile_engine(engine) as profile:
+#       run_engine(courses_df, student, course_facts, engine)
+#   print(profile.report())
+#
+#   python engine_profiler.py --students 200
+#   python batch_recommendation.py students.jsonl --profile profile.json
+#
+# Hooks are installed on one engine instance for the duration of the with
+# block and removed afterwards; an engine that is not being profiled runs
+# unchanged experta code.
+import argparse
+import inspect
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from experta import KnowledgeEngine
+from experta.matchers.rete.nodes import ConflictSetNode, WhereNode
+
+from course_catalog import CATALOG_FILE, load_courses, course_fact_fields
+
+
+class EngineProfile:
+    """Counters accumulated over every run of the profiled engine(s)."""
+
+    def __init__(self):
+        self.runs = 0
+        self.activations = Counter()   # rule -> activations added to the agenda
+        self.removed = Counter()       # rule -> activations withdrawn by a retraction, fired or not
+        self.firings = Counter()       # rule -> times its body ran
+        self.rule_time = Counter()     # rule -> seconds in its body
+        self.tests = {}                # TEST label -> [evaluations, passed]
+        self.facts = Counter()         # fact class -> facts declared
+        self.retracted = Counter()     # fact class -> facts retracted
+        self.run_time = 0.0            # seconds inside engine.run()
+        self.match_time = 0.0          # ... propagating facts through the network during runs
+        self.agenda_time = 0.0         # ... ordering activations into the agenda during runs
+        self.declare_time = 0.0        # seconds matching and ordering for facts declared outside runs
+        self.agenda_peak = 0
+        self.agenda_sizes = []         # agenda_sizes[i]: summed agenda size before step i of each run
+        self.agenda_samples = []       # agenda_samples[i]: runs that reached step i
+        self.firing = None
+        self.fire_start = 0.0
+        self.step = 0
+
+    def close_firing(self, now):
+        if self.firing is not None:
+            self.rule_time[self.firing] += now - self.fire_start
+            self.firing = None
+
+    def record_agenda(self, size):
+        if self.step == len(self.agenda_sizes):
+            self.agenda_sizes.append(0)
+            self.agenda_samples.append(0)
+        self.agenda_sizes[self.step] += size
+        self.agenda_samples[self.step] += 1
+        self.agenda_peak = max(self.agenda_peak, size)
+
+    def as_dict(self):
+        rules = sorted(set(self.activations) | set(self.firings), key=lambda rule: -self.rule_time[rule])
+        return {
+            'runs': self.runs,
+            'run_time': self.run_time,
+            'match_time': self.match_time,
+            'agenda_time': self.agenda_time,
+            'rule_time': sum(self.rule_time.values()),
+            'declare_time': self.declare_time,
+            'rules': {rule: {'activations': self.activations[rule], 'removed': self.removed[rule],
+                             'firings': self.firings[rule], 'time': self.rule_time[rule]} for rule in rules},
+            'tests': {label: {'evaluations': evaluations, 'passed': passed}
+                      for label, (evaluations, passed) in self.tests.items()},
+            'facts_declared': dict(self.facts),
+            'facts_retracted': dict(self.retracted),
+            'agenda_peak': self.agenda_peak,
+            'agenda_mean_by_step': [size / samples for size, samples in zip(self.agenda_sizes, self.agenda_samples)]
+        }
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def report(self):
+        """Plain-text summary, slowest rules first."""
+        data = self.as_dict()
+        per_run = 1000 / max(self.runs, 1)
+        lines = [f"{self.runs} runs, {data['run_time'] * per_run:.3f} ms per run: "
+                 f"matching {data['match_time'] * per_run:.3f} ms, agenda {data['agenda_time'] * per_run:.3f} ms, "
+                 f"rule bodies {data['rule_time'] * per_run:.3f} ms",
+                 f"declarations outside runs: {data['declare_time'] * per_run:.3f} ms per run",
+                 f"{'rule':<34}{'activations':>12}{'removed':>9}{'firings':>9}{'ms/run':>9}"]
+        for rule, stats in data['rules'].items():
+            lines.append(f"{rule:<34}{stats['activations']:>12}{stats['removed']:>9}{stats['firings']:>9}"
+                         f"{stats['time'] * per_run:>9.3f}")
+        if data['tests']:
+            lines.append(f"{'TEST':<68}{'evaluations':>12}{'passed':>9}")
+            for label, stats in sorted(data['tests'].items(), key=lambda item: -item[1]['evaluations']):
+                lines.append(f"{label[:67]:<68}{stats['evaluations']:>12}{stats['passed']:>9}")
+        lines.append("facts declared: " + ", ".join(f"{name} {count}" for name, count in data['facts_declared'].items()))
+        sizes = data['agenda_mean_by_step']
+        lines.append(f"agenda: peak {data['agenda_peak']}, mean {sum(sizes) / max(len(sizes), 1):.1f} "
+                     f"over {len(sizes)} steps")
+        return "\n".join(lines)
+
+
+def network_tests(engine):
+    """(WhereNode, label) for every TEST in the engine's RETE network; the
+    label is the rule(s) it belongs to and the TEST source."""
+    tests = []
+    seen = set()
+    pending = [engine.matcher.root_node]
+    while pending:
+        node = pending.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        children = [child.node for child in node.children]
+        if isinstance(node, WhereNode):
+            tests.append((node, f"{'/'.join(sorted(node_rules(node)))}: {test_source(node.matcher.test)}"))
+        pending.extend(children)
+    return tests
+
+
+def node_rules(node):
+    if isinstance(node, ConflictSetNode):
+        return {node.rule.__name__}
+    rules = set()
+    for child in node.children:
+        rules |= node_rules(child.node)
+    return rules
+
+
+def test_source(test):
+    try:
+        source = inspect.getsource(test).strip()
+    except (OSError, TypeError):
+        return f"TEST({', '.join(inspect.signature(test).parameters)})"
+    return source[:-1] if source.endswith(',') else source
+
+
+@contextmanager
+def profile_engine(engine, profile=None):
+    """Record into ``profile`` (a new EngineProfile by default) everything
+    ``engine`` does inside the with block; yields the profile."""
+    if not isinstance(engine, KnowledgeEngine):
+        raise TypeError(f"Only experta engines can be profiled, not {type(engine).__name__}")
+    if 'run' in vars(engine):
+        raise RuntimeError("Engine is already being profiled")
+    profile = profile if profile is not None else EngineProfile()
+    clock = time.perf_counter
+    run = engine.run
+    update_agenda = engine.strategy.update_agenda
+
+    def profiled_run(*args, **kwargs):
+        profile.runs += 1
+        profile.step = 0
+        start = clock()
+        try:
+            return run(*args, **kwargs)
+        finally:
+            end = clock()
+            profile.close_firing(end)
+            profile.run_time += end - start
+
+    def profiled_get_activations():
+        start = clock()
+        profile.close_firing(start)
+        added, removed = engine.facts.changes
+        for fact in added:
+            profile.facts[type(fact).__name__] += 1
+        for fact in removed:
+            profile.retracted[type(fact).__name__] += 1
+        changes = engine.matcher.changes(added, removed)
+        if engine.running:
+            profile.match_time += clock() - start
+        else:
+            profile.declare_time += clock() - start
+        return changes
+
+    def profiled_update_agenda(agenda, added, removed):
+        start = clock()
+        for activation in added:
+            profile.activations[activation.rule.__name__] += 1
+        for activation in removed:
+            profile.removed[activation.rule.__name__] += 1
+        update_agenda(agenda, added, removed)
+        now = clock()
+        if not engine.running:
+            profile.declare_time += now - start
+        else:
+            profile.agenda_time += now - start
+            profile.record_agenda(len(agenda.activations))
+            profile.step += 1
+            if agenda.activations:
+                # DepthStrategy keeps the next activation to fire last
+                profile.firing = agenda.activations[-1].rule.__name__
+                profile.firings[profile.firing] += 1
+                profile.fire_start = now
+
+    def counted(matcher, counts):
+        def test(context):
+            counts[0] += 1
+            passed = matcher(context)
+            if passed:
+                counts[1] += 1
+            return passed
+        return test
+
+    tests = [(node, label, node.matcher) for node, label in network_tests(engine)]
+    for node, label, matcher in tests:
+        node.matcher = counted(matcher, profile.tests.setdefault(label, [0, 0]))
+    engine.run = profiled_run
+    engine.get_activations = profiled_get_activations
+    engine.strategy.update_agenda = profiled_update_agenda
+    try:
+        yield profile
+    finally:
+        for node, _, matcher in tests:
+            node.matcher = matcher
+        del engine.run
+        del engine.get_activations
+        del engine.strategy.update_agenda
+        profile.firing = None
+
+
+def main(argv=None):
+    from fast_engine import random_students
+    from recommendation_pipeline import create_engine, normalize_student, run_engine
+
+    parser = argparse.ArgumentParser(description="Profile the experta engine's rules on random transcripts.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV")
+    parser.add_argument('--students', type=int, default=200, help="Number of random transcripts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="Also write the profile as JSON")
+    args = parser.parse_args(argv)
+
+    courses_df = load_courses(args.catalog)
+    course_facts = course_fact_fields(courses_df)
+    engine = create_engine(courses_df, kind='experta')
+    with profile_engine(engine) as profile:
+        for record in random_students(courses_df, args.students, args.seed):
+            run_engine(courses_df, normalize_student(record), course_facts, engine)
+    print(profile.report())
+    if args.output:
+        profile.dump(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
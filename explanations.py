@@ -0,0 +1,122 @@
+# explanations.py
+# Explanation records: the engines emit a reason code, the course and the
+# values the message needs, and the text is only formatted when something
+# displays it. Within a run a reason's parameters follow from the course, so
+# engines deduplicate on (reason, course id) and build a record only once.
+#
+# A record is a plain (reason, course_id, params) tuple: course_id is None for
+# the credit limit and params holds the values named by REASON_PARAMS.
+
+
+class Reason:
+    """Reason codes; the values are what JSON output carries."""
+    CREDIT_LIMIT = 'credit_limit'
+    RECOMMENDED = 'recommended'
+    SENIOR_STANDING = 'senior_standing'
+    PREREQUISITES_NOT_MET = 'prerequisites_not_met'
+    COREQUISITES_NOT_MET = 'corequisites_not_met'
+    EXCEEDS_CREDIT_LIMIT = 'exceeds_credit_limit'
+    FAILED_NOT_IN_TERM = 'failed_not_in_term'
+    NOT_AVAILABLE = 'not_available'
+    SECTION_FULL = 'section_full'
+
+
+# Names of each reason's parameters, in record order
+REASON_PARAMS = {
+    Reason.CREDIT_LIMIT: ('max_credits',),
+    Reason.RECOMMENDED: ('rule',),
+    Reason.SENIOR_STANDING: (),
+    Reason.PREREQUISITES_NOT_MET: ('prerequisites',),
+    Reason.COREQUISITES_NOT_MET: ('corequisites',),
+    Reason.EXCEEDS_CREDIT_LIMIT: ('max_credits',),
+    Reason.FAILED_NOT_IN_TERM: ('semester', 'year', 'offered_semester', 'offered_year'),
+    Reason.NOT_AVAILABLE: ('semester', 'year', 'offered_semester', 'offered_year'),
+    Reason.SECTION_FULL: ('seats',)
+}
+
+CREDIT_LIMIT_EXPLANATIONS = {
+    22: "Credit limit set to 22 (overload) because CGPA ≥ 3.5.",
+    20: "Credit limit set to 20 (full load) because 2.0 ≤ CGPA < 3.5.",
+    13: "Credit limit set to 13 (half load) because CGPA < 2.0."
+}
+
+RECOMMENDATION_REASONS = {
+    'failed': "because you failed it previously and all prerequisites and co-requisites are met",
+    'core': "as a core Computer Science course because all prerequisites and co-requisites are met",
+    'other': "because all prerequisites and co-requisites are met"
+}
+
+# Text of each reason, called with the course id and the record's params.
+# f-strings: a cohort run renders a few hundred of these per student.
+EXPLANATION_RENDERERS = {
+    Reason.CREDIT_LIMIT: lambda course_id, max_credits: CREDIT_LIMIT_EXPLANATIONS[max_credits],
+    Reason.RECOMMENDED: lambda course_id, rule: f"Recommended {course_id} {RECOMMENDATION_REASONS[rule]}.",
+    Reason.SENIOR_STANDING: lambda course_id: f"Not recommended for {course_id}: Requires senior standing (90+ credits).",
+    Reason.PREREQUISITES_NOT_MET: lambda course_id, prerequisites: (
+        f"Not recommended for {course_id}: Prerequisites not met ({prerequisites})."),
+    Reason.COREQUISITES_NOT_MET: lambda course_id, corequisites: (
+        f"Not recommended for {course_id}: Co-requisites not met ({corequisites})."),
+    Reason.EXCEEDS_CREDIT_LIMIT: lambda course_id, max_credits: (
+        f"Not recommended for {course_id}: Exceeds credit limit of {max_credits} credits."),
+    Reason.FAILED_NOT_IN_TERM: lambda course_id, semester, year, offered_semester, offered_year: (
+        f"Note: Failed course {course_id} is not recommended in {semester} Year {year}. "
+        f"Retake it in {offered_semester} Year {offered_year}."),
+    Reason.NOT_AVAILABLE: lambda course_id, semester, year, offered_semester, offered_year: (
+        f"Not recommended for {course_id}: Not available in {semester} Year {year}, "
+        f"available in {offered_semester} Year {offered_year}."),
+    Reason.SECTION_FULL: lambda course_id, seats: (
+        f"Not recommended for {course_id}: All {seats} seats in its sections are taken.")
+}
+
+EXPLANATION_FORMATS = ['text', 'records']
+# Explanations shown per page of the student page (Explanation System.py)
+EXPLANATIONS_PER_PAGE = 25
+
+
+def explanation_params(record):
+    """A record's parameters by name."""
+    return dict(zip(REASON_PARAMS[record[0]], record[2]))
+
+
+def render_explanation(record):
+    reason, course_id, params = record
+    return EXPLANATION_RENDERERS[reason](course_id, *params)
+
+
+def explanation_json(record, explanation_format='text'):
+    """The text of ``record``, or with 'records' a dict for machine readers:
+    {"reason": "prerequisites_not_met", "course_id": "CSE221", "params": {"prerequisites": "CSE121"}}"""
+    if explanation_format == 'text':
+        return render_explanation(record)
+    return {'reason': record[0], 'course_id': record[1], 'params': explanation_params(record)}
+
+
+def encode_explanations(records):
+    """Compact JSON-ready form, [reason, course_id, *params] per record (see decode_explanations)."""
+    return [[reason, course_id, *params] for reason, course_id, params in records]
+
+
+def decode_explanations(rows):
+    return [(row[0], row[1], tuple(row[2:])) for row in rows]
+
+
+def recommendation_html(result, summaries):
+    """HTML the student page shows for a result: the recommended courses as
+    one string, and one block per explanation record, in order.
+    ``summaries`` maps course codes to (credit hours, semester, year)."""
+    courses = []
+    for course_id in result['recommendations']:
+        credits, semester, year = summaries[course_id]
+        courses.append(f'<div class="recommended-course">✔ Recommended {course_id} ({credits} credits, {semester} Year {year})</div>')
+    explanations = []
+    for record in result['explanations']:
+        if record[0] == Reason.RECOMMENDED:
+            explanations.append(f'<div class="explanation-success">✅ {render_explanation(record)}</div>')
+        else:
+            explanations.append(f'<div class="explanation-warning">⚠️ {render_explanation(record)}</div>')
+    return ''.join(courses), explanations
+
+
+def explanation_pages(explanations, per_page=EXPLANATIONS_PER_PAGE):
+    """``explanations`` split into pages of ``per_page``, in order."""
+    return [explanations[start:start + per_page] for start in range(0, len(explanations), per_page)]
@@ -0,0 +1,160 @@
+# fast_engine.py
+# Native (non-experta) evaluator with the same interface and output as
+# CourseRecommendationEngine, plus a differential parity check.
+#
+#   python fast_engine.py --students 2000 --seed 7
+import argparse
+import random
+import sys
+
+from inference_engine import (CourseRecommendationEngine, EligibilityChecks, PASSES, Student, Course, Recommendation,
+                              compile_catalog, credit_limit_for)
+from course_catalog import CATALOG_FILE, load_courses, course_fact_fields
+from course_selection import SELECTIONS
+
+
+class FastRecommendationEngine(EligibilityChecks):
+    """Drop-in replacement for CourseRecommendationEngine without a RETE network.
+
+    The rule set is a salience-ordered greedy scan, so run() evaluates it
+    directly: failed-course retakes, then core CS courses, then everything
+    else, each course through the same consider_course() body the experta
+    rules use.
+    """
+
+    def __init__(self, courses_df, catalog=None):
+        self.courses_df = courses_df
+        self.catalog = catalog if catalog is not None else compile_catalog(courses_df)
+        self.course_facts = None
+        self.catalog_version = None
+        self.courses = []
+        self.students = []
+        self.recommended = set()
+        self.offered = {}
+        self.clear_run_state()
+
+    def reset(self):
+        self.courses = []
+        self.students = []
+        self.recommended = set()
+        self.offered = {}
+        self.course_facts = None
+        self.catalog_version = None
+        self.clear_run_state()
+
+    def declare_courses(self, course_facts):
+        self.reset()
+        self.declare(*(Course(**fields) for fields in course_facts))
+        self.course_facts = course_facts
+
+    def replace_courses(self, first, course_facts):
+        self.courses[first:] = [Course(**fields) for fields in course_facts[first:]]
+        self.offered = {}
+        self.course_facts = course_facts
+
+    def start_run(self):
+        self.students = []
+        self.recommended = set()
+        self.clear_run_state()
+
+    def declare(self, *facts):
+        for fact in facts:
+            if isinstance(fact, Student):
+                self.students.append(fact)
+            elif isinstance(fact, Course):
+                self.courses.append(fact)
+                self.offered = {}
+            elif isinstance(fact, Recommendation):
+                self.recommended.add((fact['student_id'], fact['course_id']))
+
+    def offered_courses(self, semester, year):
+        """Courses a student in (semester, year) may take, newest declaration first."""
+        key = (semester.lower().strip(), year)
+        if key not in self.offered:
+            self.offered[key] = [course for course in reversed(self.courses)
+                                 if course['semester'].lower() == key[0] and course['year'] <= year]
+        return self.offered[key]
+
+    def run(self):
+        for student in self.students:
+            student_id = student['student_id']
+            self.select_student(student_id)
+            max_credits = credit_limit_for(student['cgpa'])
+            if max_credits is not None:
+                self.set_credit_limit(max_credits)
+            transcript = self.transcript = student['transcript']
+            offered = [course for course in self.offered_courses(student['semester'], student['year'])
+                       if not transcript.has_completed(course['cid'])]
+            for reason, matches in PASSES:
+                for course in offered:
+                    if reason != 'failed' and (student_id, course['course_id']) in self.recommended:
+                        continue
+                    if matches(course, transcript):
+                        self.consider_course(course['course_id'], course['prerequisites'], course['corequisites'],
+                                             course['credits'], transcript, reason)
+            self.select_candidates()
+        self.students = []
+
+
+def random_students(courses_df, count, seed=0):
+    """Randomized transcripts across years, semesters, CGPA bands and failures."""
+    rng = random.Random(seed)
+    codes = list(courses_df['Course Code'])
+    years = list(courses_df['Year'])
+    students = []
+    for i in range(count):
+        year = rng.randint(1, 4)
+        taken = [code for code, course_year in zip(codes, years) if course_year <= year]
+        completed = rng.sample(taken, rng.randint(0, len(taken)))
+        remaining = [code for code in codes if code not in completed]
+        failed = rng.sample(remaining, rng.randint(0, min(3, len(remaining))))
+        students.append({
+            'student_id': f"S{i:05d}",
+            'cgpa': round(rng.uniform(0.0, 4.0), 2),
+            'completed_courses': completed,
+            'failed_courses': failed,
+            'semester': rng.choice(['Fall', 'Spring']),
+            'year': year
+        })
+    return students
+
+
+def check_parity(courses_df, students, selection='greedy'):
+    """Run both engines over the same students; return the mismatching results."""
+    # Imported here: recommendation_pipeline itself imports this module
+    from recommendation_pipeline import normalize_student, run_engine, recommendation_result
+
+    catalog = compile_catalog(courses_df)
+    course_facts = course_fact_fields(courses_df)
+    reference = CourseRecommendationEngine(courses_df, catalog)
+    fast = FastRecommendationEngine(courses_df, catalog)
+    reference.set_selection(selection)
+    fast.set_selection(selection)
+    mismatches = []
+    for record in students:
+        student = normalize_student(record)
+        expected = recommendation_result(student, run_engine(courses_df, student, course_facts, reference))
+        actual = recommendation_result(student, run_engine(courses_df, student, course_facts, fast))
+        if expected != actual:
+            mismatches.append((expected, actual))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the fast engine matches the experta engine.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV")
+    parser.add_argument('--students', type=int, default=500, help="Number of random transcripts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--selection', choices=SELECTIONS, default='greedy')
+    args = parser.parse_args(argv)
+
+    courses_df = load_courses(args.catalog)
+    mismatches = check_parity(courses_df, random_students(courses_df, args.students, args.seed), args.selection)
+    for expected, actual in mismatches[:5]:
+        print(f"Mismatch for {expected['student_id']}:\n  experta: {expected}\n  fast:    {actual}")
+    print(f"{args.students - len(mismatches)}/{args.students} transcripts identical")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,10 @@
 
 
 # knowledge_base_editor.py 
+import hashlib
 import streamlit as st
 import pandas as pd
+from course_catalog import CatalogStore, CatalogCycleError
 
 @st.cache_data
 def load_data():
@@ -26,6 +28,49 @@ def load_data():
         st.error(f"Error loading CSV file: {str(e)}")
         return None
 
+def catalog_store():
+    # Versioned catalog behind st.session_state.courses_data; edits go through
+    # it so engines and caches can apply them incrementally
+    if 'catalog_store' not in st.session_state:
+        try:
+            st.session_state.catalog_store = CatalogStore(st.session_state.courses_data)
+        except CatalogCycleError as e:
+            st.error(f"❌ Invalid course catalog. {e}")
+            st.stop()
+        st.session_state.courses_data = st.session_state.catalog_store.courses_df
+    return st.session_state.catalog_store
+
+def catalog_version():
+    # Key for the cached catalog views below: a digest of every column,
+    # recomputed only when the store's version moves
+    store = catalog_store()
+    cached = st.session_state.get('catalog_version')
+    if cached is None or cached[0] != store.version:
+        digest = hashlib.sha1(pd.util.hash_pandas_object(store.courses_df).values.tobytes()).hexdigest()[:16]
+        cached = st.session_state.catalog_version = (store.version, digest)
+    return cached[1]
+
+# Derived views of the catalog, shared by every session and rerun that sees
+# the same catalog version; the DataFrame itself is not hashed (leading _)
+@st.cache_data(max_entries=32)
+def catalog_codes(version, _courses_data):
+    return _courses_data['Course Code'].tolist()
+
+@st.cache_data(max_entries=32)
+def course_summaries(version, _courses_data):
+    """Course code -> (credit hours, semester offered, year)."""
+    return {row['Course Code']: (row['Credit Hours'], row['Semester Offered'], row['Year'])
+            for row in _courses_data.to_dict('records')}
+
+@st.cache_data(max_entries=256)
+def courses_by_semester_and_year(version, semester, year, _courses_data):
+    filtered = _courses_data
+    if semester != 'Both':
+        filtered = filtered[filtered['Semester Offered'].str.contains(semester, case=False, na=False)]
+    if year is not None:
+        filtered = filtered[filtered['Year'] == year]
+    return filtered[['Course Code', 'Course Name', 'Credit Hours', 'Semester Offered', 'Year', 'Prerequisites', 'Co-requisites']]
+
 def display_courses():
     with st.container():
         st.markdown("### 📋 Display All Courses")
@@ -49,18 +94,14 @@ def display_courses_by_semester_and_year():
         with st.expander("Filter Options", expanded=True):
             semester = st.selectbox("Select Semester", ["Fall", "Spring", "Both"], help="Choose a semester to filter courses")
             year_input = st.text_input("Enter Academic Year (1-4, or leave blank for all years)", help="Enter a year between 1 and 4")
-            filtered = st.session_state.courses_data.copy()
-            if semester != 'Both':
-                filtered = filtered[filtered['Semester Offered'].str.contains(semester, case=False, na=False)]
-            if year_input and year_input.isdigit():
-                year = int(year_input)
-                filtered = filtered[filtered['Year'] == year]
+            year = int(year_input) if year_input and year_input.isdigit() else None
+            filtered = courses_by_semester_and_year(catalog_version(), semester, year, st.session_state.courses_data)
             if filtered.empty:
                 st.warning(f"No courses available for {semester} in Year {year_input or 'all years'}")
             else:
                 st.write(f"Courses available for {semester} - Year {year_input or 'all years'}:")
                 st.dataframe(
-                    filtered[['Course Code', 'Course Name', 'Credit Hours', 'Semester Offered', 'Year', 'Prerequisites', 'Co-requisites']],
+                    filtered,
                     use_container_width=True,
                     column_config={
                         "Course Code": st.column_config.TextColumn("Code", width="small"),
@@ -111,7 +152,13 @@ def add_course():
                     'Semester Offered': semester,
                     'Year': year
                 }
-                st.session_state.courses_data = pd.concat([courses_data, pd.DataFrame([new_row])], ignore_index=True)
+                store = catalog_store()
+                try:
+                    store.add_course(new_row)
+                except CatalogCycleError as e:
+                    st.error(f"❌ {e}")
+                    return
+                st.session_state.courses_data = store.courses_df
                 st.success(f"✅ Course added: {code} - {name}")
 
 def edit_course():
@@ -132,12 +179,20 @@ def edit_course():
                 semester = st.selectbox("Semester Offered", ["Fall", "Spring", "Both"], index=["Fall", "Spring", "Both"].index(current_semester), help="Update the semester")
                 submit = st.form_submit_button("Update Course")
                 if submit:
-                    st.session_state.courses_data.at[idx, 'Course Name'] = name
-                    st.session_state.courses_data.at[idx, 'Description'] = desc
-                    st.session_state.courses_data.at[idx, 'Prerequisites'] = prereq if prereq else None
-                    st.session_state.courses_data.at[idx, 'Co-requisites'] = coreq if coreq else None
-                    st.session_state.courses_data.at[idx, 'Credit Hours'] = credits
-                    st.session_state.courses_data.at[idx, 'Semester Offered'] = semester
+                    store = catalog_store()
+                    try:
+                        store.edit_course(course_code, {
+                            'Course Name': name,
+                            'Description': desc,
+                            'Prerequisites': prereq,
+                            'Co-requisites': coreq,
+                            'Credit Hours': credits,
+                            'Semester Offered': semester
+                        })
+                    except CatalogCycleError as e:
+                        st.error(f"❌ {e}")
+                        return
+                    st.session_state.courses_data = store.courses_df
                     st.success(f"✅ Course updated: {course_code}")
 
 def delete_course():
@@ -148,7 +203,9 @@ def delete_course():
         course_code = st.selectbox("Select Course Code to Delete", courses_data['Course Code'], help="Choose a course to delete")
         if st.button("Delete Course", type="primary"):
             if course_code in courses_data['Course Code'].values:
-                st.session_state.courses_data = courses_data[courses_data['Course Code'] != course_code]
+                store = catalog_store()
+                store.delete_course(course_code)
+                st.session_state.courses_data = store.courses_df
                 st.success(f"✅ Course deleted: {course_code}")
             else:
                 st.error("❌ Course not found")
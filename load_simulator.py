@@ -0,0 +1,355 @@
+# load_simulator.py
+# Registration-day load test for sizing hardware: synthesize a cohort whose
+# transcripts follow the catalog's prerequisite structure, replay it against
+# the recommendation service at increasing concurrency and report latency
+# percentiles, the throughput ceiling and memory growth.
+#
+#   python load_simulator.py --students 5000 --concurrency 1 8 32 128 --workers 4 -o load_report.json
+#   python load_simulator.py --port 8000 --server-pid 4242 --concurrency 64   # an already running server
+#   python load_simulator.py --students 20000 --write-students cohort.jsonl --concurrency
+#
+# Each synthesized student is walked through every term before the current
+# one: they take the courses offered that term whose prerequisites (and senior
+# standing) they have, failed retakes first, up to a course load within
+# their credit cap, and fail each attempt with a chance that falls with their
+# CGPA. Completed sets are therefore ones a real student could hold.
+#
+# A concurrency level of N is N keep-alive connections, each sending the next
+# request as soon as its previous response arrives, like N students pressing
+# "Get Recommendations" over and over. Without --port every level gets a
+# fresh in-process service (see recommendation_server.py), so its cache and
+# memory start cold; the client then shares the server's event loop, so run
+# `recommendation_server.py serve` separately for the most faithful numbers.
+# Memory is the resident size of the server process and its engine workers,
+# read from /proc (Linux).
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+
+from batch_recommendation import read_students, write_jsonl
+from benchmark_recommendation import percentile
+from catalog_snapshot import load_catalog
+from course_catalog import CATALOG_FILE, SENIOR_PROJECTS
+from course_selection import SELECTIONS
+from inference_engine import SENIOR_STANDING_CREDITS, Transcript, credit_limit_for
+from recommendation_pipeline import ENGINES
+from recommendation_server import RecommendationClient, RecommendationService, start_server
+
+TERMS = ['Fall', 'Spring']
+# Share of the student body in each year; later years are smaller after attrition
+YEAR_WEIGHTS = {1: 0.3, 2: 0.26, 3: 0.23, 4: 0.21}
+CGPA_MEAN = 2.85
+CGPA_SD = 0.6
+# Credit hours a student signs up for in a term, before their credit cap
+COURSE_LOADS = [12, 15, 15, 18, 18, 18, 20, 22]
+# Chance that a student leaves an eligible course for a later term
+SKIP_RATE = 0.1
+SATURATION_GAIN = 1.1
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def failure_rate(cgpa):
+    """Chance that a student with this CGPA fails a course attempt."""
+    return max(0.01, min(0.35, 0.05 + 0.12 * (3.0 - cgpa)))
+
+
+def past_terms(semester, year):
+    """(semester, year) of every term before ``semester`` of ``year``, oldest first."""
+    terms = [(term, y) for y in range(1, year + 1) for term in TERMS]
+    return terms[:terms.index((semester, year))]
+
+
+class CohortSynthesizer:
+    """Random students with transcripts built term by term from ``catalog``."""
+
+    def __init__(self, catalog, seed=0):
+        self.catalog = catalog
+        self.rng = random.Random(seed)
+        self.offered = {}
+        for semester, year in itertools.product(TERMS, YEAR_WEIGHTS):
+            term = semester.lower()
+            self.offered[semester, year] = [cid for cid in range(len(catalog))
+                                            if catalog.semester_keys[cid] == term and catalog.years[cid] <= year]
+        self.needs_standing = [catalog.senior_standing[cid] or catalog.codes[cid] in SENIOR_PROJECTS
+                               for cid in range(len(catalog))]
+
+    def term_courses(self, transcript, semester, year, load):
+        """Course ids taken in one term: failed retakes first, then the term's
+        courses in catalog order, while they fit in ``load`` credits."""
+        catalog = self.catalog
+        senior = catalog.credits_of(transcript.completed) >= SENIOR_STANDING_CREDITS
+        offered = [cid for cid in self.offered[semester, year] if not transcript.has_completed(cid)]
+        offered.sort(key=lambda cid: not transcript.has_failed(cid))
+        skipped = {cid for cid in offered if not transcript.has_failed(cid) and self.rng.random() < SKIP_RATE}
+        taking = 0
+        credits = 0
+        # A second pass picks up courses whose co-requisite comes later in the order
+        for _ in range(2):
+            for cid in offered:
+                if taking >> cid & 1 or cid in skipped or credits + catalog.credits[cid] > load:
+                    continue
+                if self.needs_standing[cid] and not senior:
+                    continue
+                if not catalog.senior_standing[cid] and not transcript.satisfies(catalog.prereq_masks[cid]):
+                    continue
+                if not transcript.satisfies(catalog.coreq_masks[cid], taking):
+                    continue
+                taking |= 1 << cid
+                credits += catalog.credits[cid]
+        return taking
+
+    def student(self, student_id):
+        rng = self.rng
+        year = rng.choices(list(YEAR_WEIGHTS), weights=list(YEAR_WEIGHTS.values()))[0]
+        semester = rng.choice(TERMS)
+        cgpa = round(max(0.0, min(4.0, rng.gauss(CGPA_MEAN, CGPA_SD))), 2)
+        cap = credit_limit_for(cgpa)
+        failing = failure_rate(cgpa)
+        completed = failed = 0
+        for term, term_year in past_terms(semester, year):
+            load = min(cap, rng.choice(COURSE_LOADS))
+            for cid in self.catalog.ids_of(self.term_courses(Transcript(completed, failed), term, term_year, load)):
+                if rng.random() < failing:
+                    failed |= 1 << cid
+                else:
+                    completed |= 1 << cid
+                    failed &= ~(1 << cid)
+        return {
+            'student_id': student_id,
+            'cgpa': cgpa,
+            'completed_courses': self.catalog.codes_of(completed),
+            'failed_courses': self.catalog.codes_of(failed),
+            'semester': semester,
+            'year': year
+        }
+
+    def students(self, count):
+        return [self.student(f"L{i:06d}") for i in range(count)]
+
+
+def synthesize_students(catalog, count, seed=0):
+    """``count`` student records with realistic transcripts (see CohortSynthesizer)."""
+    return CohortSynthesizer(catalog, seed).students(count)
+
+
+def process_tree(pid):
+    """``pid`` and every process below it, from /proc (Linux)."""
+    pids = [pid]
+    for parent in pids:
+        try:
+            tasks = os.listdir(f"/proc/{parent}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{parent}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def resident_bytes(pid):
+    """Resident memory of ``pid`` and its children, None where /proc is unavailable."""
+    total = None
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/statm") as f:
+                total = (total or 0) + int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            pass
+    return total
+
+
+async def sample_memory(pid, samples, interval=0.1):
+    while True:
+        samples.append(resident_bytes(pid))
+        await asyncio.sleep(interval)
+
+
+async def replay(students, host, port, concurrency, requests):
+    """Send ``requests`` recommendation requests, cycling through
+    ``students``, over ``concurrency`` connections; return the latencies of
+    the answered requests, a Counter of response statuses and the elapsed seconds."""
+    latencies = []
+    statuses = Counter()
+    numbers = itertools.count()
+
+    async def connection():
+        client = RecommendationClient(host, port)
+        try:
+            for n in numbers:
+                if n >= requests:
+                    break
+                start = time.perf_counter()
+                try:
+                    status = (await client.recommend(students[n % len(students)]))[0]
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    await client.close()
+                    statuses['connection error'] += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                statuses[status] += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(max(1, min(concurrency, requests)))))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def run_level(args, students, concurrency):
+    service = server = None
+    host, port, pid = args.host, args.port, args.server_pid
+    if port is None:
+        service = RecommendationService(args.catalog, args.engine, args.workers, args.cache_size,
+                                        selection=args.selection)
+        server = await start_server(service, host, 0)
+        port = server.sockets[0].getsockname()[1]
+        pid = os.getpid()
+    memory = []
+    try:
+        before = resident_bytes(pid) if pid else None
+        sampler = asyncio.create_task(sample_memory(pid, memory)) if pid else None
+        latencies, statuses, elapsed = await replay(students, host, port, concurrency, args.requests or len(students))
+        if sampler is not None:
+            sampler.cancel()
+        after = resident_bytes(pid) if pid else None
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    memory = [sample for sample in memory + [before, after] if sample is not None]
+    level = {
+        'concurrency': concurrency,
+        'requests': sum(statuses.values()),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'elapsed_s': elapsed,
+        'throughput_per_s': len(latencies) / elapsed if elapsed else None,
+        'memory_start_bytes': before,
+        'memory_peak_bytes': max(memory) if memory else None,
+        'memory_end_bytes': after,
+        'memory_growth_bytes': after - before if before is not None and after is not None else None
+    }
+    if latencies:
+        level.update({
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p90_ms': percentile(latencies, 90) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': max(latencies) * 1000,
+            'mean_ms': sum(latencies) / len(latencies) * 1000
+        })
+    return level
+
+
+def throughput_ceiling(levels):
+    """(level with the highest throughput, first level that added less than
+    10% throughput over the one before it, or None)."""
+    answered = [level for level in levels if level['throughput_per_s']]
+    if not answered:
+        return None, None
+    best = max(answered, key=lambda level: level['throughput_per_s'])
+    saturated = next((level for previous, level in zip(answered, answered[1:])
+                      if level['throughput_per_s'] < previous['throughput_per_s'] * SATURATION_GAIN), None)
+    return best, saturated
+
+
+def megabytes(count):
+    return f"{count / 1e6:.1f}" if count is not None else "-"
+
+
+LEVEL_HEADER = (f"{'conns':>6}{'requests':>9}{'errors':>7}{'req/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+                f"{'max ms':>9}{'peak MB':>10}{'grew MB':>9}")
+
+
+def level_line(level):
+    errors = sum(count for status, count in level['statuses'].items() if status != '200')
+    if 'p50_ms' not in level:
+        return f"{level['concurrency']:>6}{level['requests']:>9}{errors:>7}  no answered requests"
+    return (f"{level['concurrency']:>6}{level['requests']:>9}{errors:>7}{level['throughput_per_s']:>10.1f}"
+            f"{level['p50_ms']:>9.1f}{level['p90_ms']:>9.1f}{level['p99_ms']:>9.1f}{level['max_ms']:>9.1f}"
+            f"{megabytes(level['memory_peak_bytes']):>10}{megabytes(level['memory_growth_bytes']):>9}")
+
+
+def summary(levels):
+    """The throughput ceiling and saturation point, as text."""
+    lines = []
+    best, saturated = throughput_ceiling(levels)
+    if best is not None:
+        lines.append(f"throughput ceiling: {best['throughput_per_s']:.1f} req/s at {best['concurrency']} connections")
+    if saturated is not None:
+        lines.append(f"saturated from {saturated['concurrency']} connections: more only adds latency "
+                     f"(p99 {saturated['p99_ms']:.1f} ms)")
+    return "\n".join(lines)
+
+
+async def simulate(args, students):
+    levels = []
+    for concurrency in args.concurrency:
+        level = await run_level(args, students, concurrency)
+        print(level_line(level), file=sys.stderr)
+        levels.append(level)
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registration-day load test of the recommendation service.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot")
+    parser.add_argument('--students', type=int, default=1000, help="Synthetic students in the cohort")
+    parser.add_argument('--cohort', help="Replay this CSV or JSONL student file instead of a synthetic cohort")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-students', help="Write the synthetic cohort as JSONL")
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 4, 16, 64],
+                        help="Concurrent connections of each load level, in order (none: only synthesize)")
+    parser.add_argument('--requests', type=int, help="Requests per level (default: one per student)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="Load an already running server (default: a fresh in-process one per level)")
+    parser.add_argument('--server-pid', type=int, help="Process id of the --port server, to measure its memory")
+    parser.add_argument('--workers', type=int, default=0, help="Engine processes of the in-process service (0 = one engine thread)")
+    parser.add_argument('--engine', choices=list(ENGINES), help="Recommendation engine (default: $RECOMMENDATION_ENGINE or experta)")
+    parser.add_argument('--selection', choices=SELECTIONS, help="How eligible courses share the credit cap (default: $RECOMMENDATION_SELECTION or greedy)")
+    parser.add_argument('--cache-size', type=int, default=10000, help="Cached results kept by the in-process service (0 disables the cache)")
+    parser.add_argument('-o', '--output', help="JSON report file")
+    args = parser.parse_args(argv)
+    if any(concurrency < 1 for concurrency in args.concurrency):
+        parser.error("--concurrency levels must be at least 1")
+
+    if args.cohort:
+        students = list(read_students(args.cohort))
+    else:
+        students = synthesize_students(load_catalog(args.catalog)[1], args.students, args.seed)
+    if args.write_students:
+        with open(args.write_students, 'w', encoding='utf-8') as out:
+            write_jsonl(students, out)
+    if not args.concurrency or not students:
+        return 0
+    print(LEVEL_HEADER, file=sys.stderr)
+    levels = asyncio.run(simulate(args, students))
+    print(summary(levels), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'students': len(students),
+                'seed': args.seed,
+                'workers': args.workers if args.port is None else None,
+                'engine': args.engine,
+                'levels': levels
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
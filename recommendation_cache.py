@@ -0,0 +1,184 @@
+# recommendation_cache.py
+# Result cache in front of the recommendation engines. Students with the same
+# catalog, credit band, year, semester and completed/failed courses get the
+# same recommendations and explanations, so those are computed once.
+import json
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+
+from explanations import encode_explanations, decode_explanations
+
+from inference_engine import Transcript, credit_limit_for
+from recommendation_pipeline import create_engine, run_engine, recommendation_result, recommend_students
+
+
+def transcript_key(catalog, student, selection='greedy'):
+    """Canonical fingerprint of everything that determines a result.
+
+    Completed and failed courses are keyed as catalog bitmasks, which are
+    order-independent like sorted code lists but much shorter.
+    """
+    transcript = Transcript.from_courses(catalog, student['completed_courses'], student['failed_courses'])
+    return '|'.join([catalog.fingerprint, str(credit_limit_for(student['cgpa'])), str(student['year']),
+                     student['semester'], f"{transcript.completed:x}", f"{transcript.failed:x}", selection])
+
+
+class RecommendationCache:
+    """LRU-bounded in-memory cache with an optional on-disk SQLite tier.
+
+    Keys start with the catalog fingerprint, so after an admin edit entries
+    computed against the old catalog can no longer be hit; in memory they age
+    out of the LRU, and on disk the first lookup under the new fingerprint
+    deletes them. sync() keeps the entries an edit provably cannot affect.
+    """
+
+    def __init__(self, max_entries=10000, path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.catalog_version = None
+        self.store_versions = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, catalog TEXT, result TEXT)")
+            self.db.commit()
+
+    def use_catalog(self, catalog):
+        if catalog.fingerprint == self.catalog_version:
+            return
+        with self.lock:
+            self.catalog_version = catalog.fingerprint
+            if self.db is not None:
+                self.db.execute("DELETE FROM results WHERE catalog != ?", (catalog.fingerprint,))
+                self.db.commit()
+
+    def sync(self, store):
+        """Carry entries over the edits made to ``store`` since the last sync.
+
+        Editing one course cannot change the result of a student whose year
+        window (courses up to Year + 1) excludes it before and after the edit
+        and who has neither completed nor failed it, so those entries are
+        re-keyed under the new fingerprint. Knapsack entries are not carried
+        over a requisite edit: their weights count dependents across the
+        whole catalog (CatalogIndex.unlock_counts). Adds and deletes renumber
+        course ids and are not carried over.
+        """
+        version = self.store_versions.get(store, store.version)
+        with self.lock:
+            for change in store.changes_since(version):
+                if change.action == 'edit' and change.fingerprint_before != change.fingerprint_after:
+                    self.carry_over(change)
+            self.store_versions[store] = store.version
+
+    def carry_over(self, change):
+        prefix = change.fingerprint_before + '|'
+        bit = 1 << change.position
+        first_year = min(change.before['Year'], change.after['Year'])
+        requisites_changed = any(change.before[column] != change.after[column]
+                                 for column in ('Prerequisites', 'Co-requisites'))
+        for key, result in list(self.entries.items()):
+            if not key.startswith(prefix):
+                continue
+            _, _, year, _, completed, failed, selection = key.split('|')
+            if selection == 'knapsack' and requisites_changed:
+                continue
+            if int(year) + 1 < first_year and not (int(completed, 16) | int(failed, 16)) & bit:
+                self.entries.setdefault(change.fingerprint_after + key[len(change.fingerprint_before):], result)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+            elif self.db is not None:
+                row = self.db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    result['explanations'] = decode_explanations(result['explanations'])
+                    self._remember(key, result)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, key, result):
+        result = {k: v for k, v in result.items() if k != 'student_id'}
+        with self.lock:
+            self._remember(key, result)
+            if self.db is not None:
+                stored = dict(result, explanations=encode_explanations(result['explanations']))
+                self.db.execute("INSERT OR REPLACE INTO results (key, catalog, result) VALUES (?, ?, ?)",
+                                (key, key.split('|', 1)[0], json.dumps(stored, ensure_ascii=False)))
+                self.db.commit()
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def recommend(self, courses_df, student, course_facts=None, engine=None):
+        """Cached equivalent of recommendation_result(student, run_engine(...))."""
+        if engine is None:
+            engine = create_engine(courses_df)
+        self.use_catalog(engine.catalog)
+        key = transcript_key(engine.catalog, student, engine.selection)
+        result = self.get(key)
+        if result is None:
+            result = recommendation_result(student, run_engine(courses_df, student, course_facts, engine))
+            self.put(key, result)
+        return self.student_result(student, result)
+
+    def recommend_many(self, courses_df, students, course_facts=None, engine=None):
+        """Cached equivalent of recommend_students(...): the students missing
+        from the cache are computed together in one engine run."""
+        if engine is None:
+            engine = create_engine(courses_df)
+        self.use_catalog(engine.catalog)
+        keys = [transcript_key(engine.catalog, student, engine.selection) for student in students]
+        found = {}
+        missing = {}
+        for key, student in zip(keys, students):
+            if key not in found and key not in missing:
+                result = self.get(key)
+                if result is None:
+                    missing[key] = student
+                else:
+                    found[key] = result
+        if missing:
+            for key, result in zip(missing, recommend_students(courses_df, list(missing.values()), course_facts, engine)):
+                self.put(key, result)
+                found[key] = result
+        return [self.student_result(student, found[key]) for key, student in zip(keys, students)]
+
+    @staticmethod
+    def student_result(student, result):
+        return {
+            'student_id': student['student_id'],
+            'recommendations': list(result['recommendations']),
+            'total_credits': result['total_credits'],
+            'max_credits': result['max_credits'],
+            'explanations': list(result['explanations'])
+        }
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
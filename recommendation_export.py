@@ -0,0 +1,230 @@
+# recommendation_export.py
+# Streaming export of per-student results for college-wide advising runs.
+# Results are written as they arrive, as JSONL, CSV or Parquet, optionally
+# gzip-compressed, and an interrupted export can be resumed where it stopped.
+#
+#   python batch_recommendation.py students.jsonl -o advising.jsonl.gz --workers 8
+#   python batch_recommendation.py students.jsonl -o advising.csv --resume
+#   python batch_recommendation.py students.jsonl -o advising.parquet --explanations records
+#
+# Every ``checkpoint_every`` results the output is flushed to a safe point and
+# <output>.checkpoint records how many results it holds and where it ends
+# (bytes, or finished part files for Parquet). --resume truncates the output
+# to that point and skips that many input students. JSONL and CSV rows go
+# straight to the file; Parquet buffers one checkpoint interval of results.
+import csv
+import gzip
+import json
+import os
+
+EXPORT_FORMATS = ['jsonl', 'csv', 'parquet']
+CSV_COLUMNS = ['student_id', 'recommendations', 'total_credits', 'max_credits', 'explanations', 'errors']
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+
+def export_format(path):
+    """(format, gzip) implied by an output file name, e.g. 'out.csv.gz' -> ('csv', True)."""
+    compress = path.endswith('.gz')
+    stem = path[:-3] if compress else path
+    for fmt in EXPORT_FORMATS:
+        if stem.endswith('.' + fmt):
+            return fmt, compress
+    return 'jsonl', compress
+
+
+class ByteStreamWriter:
+    """Appends to a file from byte ``offset`` on; with gzip every checkpoint
+    ends a gzip member, so the file is valid at each checkpoint offset."""
+
+    def __init__(self, path, compress, offset):
+        mode = 'r+b' if offset else 'wb'
+        self.raw = open(path, mode)
+        self.raw.truncate(offset)
+        self.raw.seek(offset)
+        self.compress = compress
+        self.stream = None if compress else self.raw
+
+    def write(self, text):
+        if self.stream is None:
+            # No file name or time in the member header: the same results
+            # always give the same bytes
+            self.stream = gzip.GzipFile(filename='', fileobj=self.raw, mode='wb', mtime=0)
+        self.stream.write(text.encode('utf-8'))
+
+    def end_member(self):
+        if self.compress and self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def checkpoint(self):
+        self.end_member()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        return self.raw.tell()
+
+    def close(self):
+        self.end_member()
+        self.raw.close()
+
+
+class JsonlWriter(ByteStreamWriter):
+    def write_result(self, result):
+        self.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+class CsvWriter(ByteStreamWriter):
+    """One row per student: course codes joined by ';', explanations and
+    errors as JSON lists."""
+
+    def __init__(self, path, compress, offset):
+        super().__init__(path, compress, offset)
+        self.rows = csv.writer(self)
+        if not offset:
+            self.rows.writerow(CSV_COLUMNS)
+
+    def write_result(self, result):
+        errors = result.get('errors')
+        self.rows.writerow([
+            result['student_id'],
+            ';'.join(result.get('recommendations', [])),
+            result.get('total_credits', ''),
+            result.get('max_credits', ''),
+            json.dumps(result['explanations'], ensure_ascii=False) if 'explanations' in result else '',
+            json.dumps(errors, ensure_ascii=False) if errors else ''
+        ])
+
+
+class ParquetWriter:
+    """A directory of part files, one per checkpoint interval; read it back
+    with pandas.read_parquet(directory). Needs pyarrow."""
+
+    def __init__(self, path, compress, offset, explanation_format='text'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.compression = 'gzip' if compress else 'snappy'
+        self.parts = offset
+        os.makedirs(path, exist_ok=True)
+        # Parts past the checkpoint belong to the interrupted run
+        for name in os.listdir(path):
+            if name.startswith('part-') and not (name.endswith('.parquet') and int(name[5:10]) < offset):
+                os.remove(os.path.join(path, name))
+        if explanation_format == 'text':
+            explanation = pa.string()
+        else:
+            explanation = pa.struct([('reason', pa.string()), ('course_id', pa.string()), ('params', pa.string())])
+        self.schema = pa.schema([
+            ('student_id', pa.string()),
+            ('recommendations', pa.list_(pa.string())),
+            ('total_credits', pa.float64()),
+            ('max_credits', pa.int64()),
+            ('explanations', pa.list_(explanation)),
+            ('errors', pa.list_(pa.string()))
+        ])
+        self.columns = {name: [] for name in self.schema.names}
+
+    def write_result(self, result):
+        explanations = result.get('explanations')
+        if explanations and isinstance(explanations[0], dict):
+            # Record params differ per reason, so they are stored as JSON text
+            explanations = [dict(record, params=json.dumps(record['params'], ensure_ascii=False))
+                            for record in explanations]
+        self.columns['student_id'].append(result['student_id'])
+        self.columns['recommendations'].append(result.get('recommendations'))
+        self.columns['total_credits'].append(result.get('total_credits'))
+        self.columns['max_credits'].append(result.get('max_credits'))
+        self.columns['explanations'].append(explanations)
+        self.columns['errors'].append(result.get('errors'))
+
+    def checkpoint(self):
+        if self.columns['student_id']:
+            table = self.pa.Table.from_pydict(self.columns, schema=self.schema)
+            part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            self.pq.write_table(table, part + '.tmp', compression=self.compression)
+            os.replace(part + '.tmp', part)
+            self.parts += 1
+            self.columns = {name: [] for name in self.schema.names}
+        return self.parts
+
+    def close(self):
+        pass
+
+
+class ResultExport:
+    """Context manager writing results to ``path`` with checkpoints.
+
+    With ``resume``, ``written`` is the number of results the output already
+    holds (skip that many input students) and new results are appended.
+    Leaving the with block, normally or by an exception, writes a final
+    checkpoint.
+    """
+
+    def __init__(self, path, fmt=None, compress=None, explanation_format='text', resume=False, checkpoint_every=1000):
+        implied_format, implied_compress = export_format(path)
+        self.path = path
+        self.settings = {
+            'format': fmt or implied_format,
+            'gzip': implied_compress if compress is None else compress,
+            'explanations': explanation_format
+        }
+        if self.settings['format'] not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+        self.checkpoint_every = checkpoint_every
+        self.written = 0
+        offset = 0
+        checkpoint = self.read_checkpoint() if resume else None
+        if checkpoint is not None:
+            if checkpoint['settings'] != self.settings:
+                raise ValueError(f"Cannot resume {path}: it was started with {checkpoint['settings']}")
+            self.written = checkpoint['written']
+            offset = checkpoint['offset']
+        elif os.path.exists(path + CHECKPOINT_SUFFIX):
+            os.remove(path + CHECKPOINT_SUFFIX)
+        self.pending = 0
+        fmt, compress = self.settings['format'], self.settings['gzip']
+        if fmt == 'parquet':
+            self.writer = ParquetWriter(path, compress, offset, explanation_format)
+        else:
+            self.writer = (CsvWriter if fmt == 'csv' else JsonlWriter)(path, compress, offset)
+
+    def read_checkpoint(self):
+        try:
+            with open(self.path + CHECKPOINT_SUFFIX, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, result):
+        self.writer.write_result(result)
+        self.pending += 1
+        if self.pending >= self.checkpoint_every:
+            self.checkpoint()
+
+    def write_all(self, results):
+        for result in results:
+            self.write(result)
+        return self.written
+
+    def checkpoint(self):
+        offset = self.writer.checkpoint()
+        self.written += self.pending
+        self.pending = 0
+        temporary = self.path + CHECKPOINT_SUFFIX + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'written': self.written, 'offset': offset}, f)
+        os.replace(temporary, self.path + CHECKPOINT_SUFFIX)
+
+    def close(self):
+        self.checkpoint()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
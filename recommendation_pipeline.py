@@ -0,0 +1,214 @@
+# recommendation_pipeline.py
+# Single-student recommendation run without any UI: validation, fact
+# declaration, inference and the post-run explanation passes.
+import os
+
+import numpy as np
+
+from inference_engine import CourseRecommendationEngine, Student, Transcript
+from fast_engine import FastRecommendationEngine
+from course_catalog import course_fact_fields
+from explanations import Reason, EXPLANATION_RENDERERS, explanation_json
+
+# Selected with the RECOMMENDATION_ENGINE environment variable or --engine
+ENGINES = {
+    'experta': CourseRecommendationEngine,
+    'fast': FastRecommendationEngine
+}
+
+
+def create_engine(courses_df, catalog=None, kind=None, selection=None):
+    """Engine of ``kind`` (default $RECOMMENDATION_ENGINE or experta) using the
+    ``selection`` stage (default $RECOMMENDATION_SELECTION or greedy)."""
+    kind = kind or os.environ.get('RECOMMENDATION_ENGINE', 'experta')
+    if kind not in ENGINES:
+        raise ValueError(f"Unknown recommendation engine '{kind}' (expected one of: {', '.join(ENGINES)})")
+    engine = ENGINES[kind](courses_df, catalog)
+    engine.set_selection(selection or os.environ.get('RECOMMENDATION_SELECTION', 'greedy'))
+    return engine
+
+
+def split_courses(courses):
+    """Accept a list of codes or a comma/semicolon separated string."""
+    if not courses:
+        return []
+    if isinstance(courses, str):
+        courses = courses.replace(';', ',').split(',')
+    return list(dict.fromkeys(course.strip() for course in courses if course and course.strip()))
+
+
+def normalize_student(record):
+    """Turn a raw CSV/JSONL/form record into the fields the engine expects."""
+    year = record.get('year', '')
+    cgpa = record.get('cgpa', 0.0)
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        pass
+    try:
+        cgpa = float(cgpa)
+    except (TypeError, ValueError):
+        pass
+    return {
+        'student_id': str(record.get('student_id', '') or ''),
+        'cgpa': cgpa,
+        'completed_courses': split_courses(record.get('completed_courses')),
+        'failed_courses': split_courses(record.get('failed_courses')),
+        'semester': (record.get('semester') or '').strip(),
+        'year': year
+    }
+
+
+def validate_student(student, course_codes):
+    errors = []
+    if not student['student_id']:
+        errors.append("Student ID is required.")
+    if not isinstance(student['cgpa'], float) or not (0.0 <= student['cgpa'] <= 4.0):
+        errors.append("CGPA must be between 0.0 and 4.0.")
+    if student['semester'] not in ['Fall', 'Spring']:
+        errors.append("Please select a semester ('Fall' or 'Spring').")
+    if student['year'] not in [1, 2, 3, 4]:
+        errors.append("Please select a year between 1 and 4.")
+    overlapping_courses = set(student['completed_courses']).intersection(student['failed_courses'])
+    if overlapping_courses:
+        errors.append(f"Error: The following courses cannot be both completed and failed: {', '.join(overlapping_courses)}")
+    invalid_failed = [course for course in student['failed_courses'] if course not in course_codes]
+    invalid_completed = [course for course in student['completed_courses'] if course not in course_codes]
+    if invalid_failed:
+        errors.append(f"Invalid failed courses: {', '.join(invalid_failed)}")
+    if invalid_completed:
+        errors.append(f"Invalid completed courses: {', '.join(invalid_completed)}")
+    return errors
+
+
+def explain_unavailable_courses(engine, completed_courses, failed_courses, semester, year, transcript=None):
+    """Post-run passes: failed courses out of term, and courses not offered now.
+
+    The pending / in-term filters are computed for the whole catalog at once
+    with NumPy masks; only the flagged courses become explanations.
+    """
+    catalog = engine.catalog
+    if transcript is None:
+        transcript = engine.transcript_of(completed_courses)
+    term = semester.lower()
+    for course_id in failed_courses:
+        idx = catalog.ids.get(course_id)
+        if idx is not None and (catalog.semester_keys[idx] != term or catalog.years[idx] > year):
+            engine.add_explanation(Reason.FAILED_NOT_IN_TERM, course_id, semester, year,
+                                   catalog.semesters[idx], int(catalog.year_values[idx]))
+    pending = ~catalog.mask_array(transcript.completed | catalog.mask(engine.recommendations))
+    in_term = (catalog.semester_keys == term) & (catalog.years <= year)
+    unavailable = pending & ~in_term & (catalog.years <= year + 1)
+    check_prerequisites = pending & in_term
+    for idx in np.flatnonzero(unavailable | check_prerequisites):
+        course_id = catalog.codes[idx]
+        if unavailable[idx]:
+            engine.add_explanation(Reason.NOT_AVAILABLE, course_id, semester, year,
+                                   catalog.semesters[idx], int(catalog.year_values[idx]))
+        else:
+            engine.prerequisites_met(catalog.prerequisites[idx], transcript, course_id)
+
+
+def declare_student(engine, courses_df, student, course_facts=None):
+    """Prepare ``engine`` for one normalized student and return their Transcript.
+
+    Pass precomputed ``course_facts`` (see course_fact_fields) and a reusable
+    ``engine``: the Course facts are declared on the first run and kept, and
+    later runs only swap the Student fact.
+    """
+    return declare_students(engine, courses_df, [student], course_facts)[0]
+
+
+def declare_students(engine, courses_df, students, course_facts=None):
+    """Like declare_student, for several students sharing one run; returns
+    their Transcripts. Student ids must be unique within the run."""
+    if course_facts is None:
+        course_facts = engine.course_facts or course_fact_fields(courses_df)
+    if engine.course_facts is course_facts:
+        engine.start_run()
+    else:
+        engine.declare_courses(course_facts)
+    transcripts = []
+    for student in students:
+        transcript = Transcript.from_courses(engine.catalog, student['completed_courses'], student['failed_courses'])
+        engine.declare(Student(
+            student_id=student['student_id'],
+            cgpa=student['cgpa'],
+            completed_courses=','.join(student['completed_courses']),
+            failed_courses=','.join(student['failed_courses']),
+            semester=student['semester'],
+            year=student['year'],
+            transcript=transcript
+        ))
+        transcripts.append(transcript)
+    return transcripts
+
+
+def run_engine(courses_df, student, course_facts=None, engine=None):
+    """Run inference and the explanation passes for one student; return the engine."""
+    if engine is None:
+        engine = create_engine(courses_df)
+    transcript = declare_student(engine, courses_df, student, course_facts)
+    engine.run()
+    engine.select_student(student['student_id'])
+    explain_unavailable_courses(engine, student['completed_courses'], student['failed_courses'],
+                                student['semester'], student['year'], transcript)
+    return engine
+
+
+def recommend_students(courses_df, students, course_facts=None, engine=None):
+    """Result dicts for many normalized students, in order, from a single
+    engine run: the Course facts are matched once for the whole group
+    instead of once per student. Student ids must be unique."""
+    student_ids = [student['student_id'] for student in students]
+    if len(set(student_ids)) != len(student_ids):
+        raise ValueError("Students in one run need distinct student_id values")
+    if engine is None:
+        engine = create_engine(courses_df)
+    transcripts = declare_students(engine, courses_df, students, course_facts)
+    engine.run()
+    results = []
+    for student, transcript in zip(students, transcripts):
+        engine.select_student(student['student_id'])
+        explain_unavailable_courses(engine, student['completed_courses'], student['failed_courses'],
+                                    student['semester'], student['year'], transcript)
+        results.append(recommendation_result(student, engine))
+    return results
+
+
+def student_groups(students, run_size):
+    """Split ``students`` into consecutive groups for recommend_students: at
+    most ``run_size`` each, with distinct student ids."""
+    group = []
+    student_ids = set()
+    for student in students:
+        if len(group) == run_size or student['student_id'] in student_ids:
+            yield group
+            group = []
+            student_ids = set()
+        group.append(student)
+        student_ids.add(student['student_id'])
+    if group:
+        yield group
+
+
+def recommendation_result(student, engine):
+    """Result dict of a run; ``explanations`` holds explanation records (see result_json)."""
+    return {
+        'student_id': student['student_id'],
+        'recommendations': list(engine.recommendations),
+        'total_credits': engine.total_credits,
+        'max_credits': engine.max_credits,
+        'explanations': list(engine.explanations)
+    }
+
+
+def result_json(result, explanation_format='text'):
+    """JSON-ready copy of a result: explanations rendered as text, or with
+    'records' as reason/course_id/params objects for the portal."""
+    if 'explanations' not in result:
+        return result
+    if explanation_format == 'text':
+        return dict(result, explanations=[EXPLANATION_RENDERERS[reason](course_id, *params)
+                                          for reason, course_id, params in result['explanations']])
+    return dict(result, explanations=[explanation_json(record, explanation_format) for record in result['explanations']])
@@ -0,0 +1,418 @@
+# recommendation_server.py
+# Headless HTTP/JSON recommendation service on asyncio (standard library only).
+#
+#   python recommendation_server.py serve --port 8000 --workers 4 --catalog catalog.snapshot
+#   python recommendation_server.py client students.jsonl --port 8000 -o results.jsonl
+#   python recommendation_server.py client students.jsonl --local      # starts an in-process server
+#
+#   POST /recommend        one student record   -> result (422 with "errors" if invalid)
+#   POST /recommend/batch  list of records, or {"students": [...]} -> {"results": [...]}
+#   POST /what-if          {"student": record, "scenarios": [transcript change, ...]}
+#                          -> {"base": result, "scenarios": [result, ...]} (see what_if.py);
+#                          400 if a scenario is invalid, which then holds its "errors"
+#   GET  /health           catalog fingerprint and cache statistics
+#
+# Add ?explanations=records to get explanations as reason/course_id/params
+# objects instead of text.
+#
+# The catalog is compiled once and kept in memory. Recommendations run in a
+# pool of warm engines (see batch_recommendation._init_worker) so the event
+# loop only parses requests, validates, checks the result cache and writes
+# responses.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from batch_recommendation import (read_students, write_jsonl, _init_worker, _recommend_in_worker,
+                                  _recommend_chunk_in_worker)
+from catalog_snapshot import load_catalog
+from course_catalog import CATALOG_FILE, SNAPSHOT_SUFFIX
+from recommendation_cache import RecommendationCache, transcript_key
+from course_selection import SELECTIONS
+from explanations import EXPLANATION_FORMATS
+from recommendation_pipeline import ENGINES, normalize_student, validate_student, result_json
+from what_if import WhatIf, what_if_json
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    422: 'Unprocessable Entity',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _pid():
+    return os.getpid()
+
+
+class RecommendationService:
+    """Validation, result cache and engine pool behind the HTTP endpoints.
+
+    With ``workers`` > 0 engines run in that many processes; with 0 a single
+    background thread holds one engine, which keeps the process small for
+    local use.
+    """
+
+    def __init__(self, catalog_path=CATALOG_FILE, engine_kind=None, workers=0, cache_size=10000, chunk_size=32,
+                 selection=None, explanation_format='text'):
+        self.courses_df, self.catalog = load_catalog(catalog_path)
+        self.selection = selection or os.environ.get('RECOMMENDATION_SELECTION', 'greedy')
+        self.explanation_format = explanation_format
+        self.course_codes = set(self.catalog.codes)
+        self.cache = RecommendationCache(cache_size) if cache_size else None
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.pending = {}
+        snapshot_path = catalog_path if catalog_path.endswith(SNAPSHOT_SUFFIX) else None
+        initargs = (None if snapshot_path else self.courses_df, engine_kind, 0, None, snapshot_path, self.selection)
+        if workers:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs)
+
+    async def warm_up(self):
+        """Start the workers (each builds its engine) before the first request."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _pid) for _ in range(self.workers or 1)))
+
+    def validate(self, record):
+        if not isinstance(record, dict):
+            raise HttpError(400, "Each student must be a JSON object.")
+        student = normalize_student(record)
+        return student, validate_student(student, self.course_codes)
+
+    def cached(self, student):
+        if self.cache is None:
+            return None, None
+        key = transcript_key(self.catalog, student, self.selection)
+        result = self.cache.get(key)
+        if result is not None:
+            result = dict({'student_id': student['student_id']}, **result)
+        return key, result
+
+    async def recommend(self, record):
+        student, errors = self.validate(record)
+        if errors:
+            return {'student_id': student['student_id'], 'errors': errors}
+        key, result = self.cached(student)
+        if result is not None:
+            return result
+        loop = asyncio.get_running_loop()
+        if key is None:
+            return await loop.run_in_executor(self.executor, _recommend_in_worker, student)
+        # Identical students arriving together share one engine run; shielded
+        # so a client that disconnects does not cancel it for the others
+        future = self.pending.get(key)
+        if future is None:
+            future = self.pending[key] = loop.run_in_executor(self.executor, _recommend_in_worker, student)
+            future.add_done_callback(lambda done: self.finish(key, done))
+        result = await asyncio.shield(future)
+        return dict(result, student_id=student['student_id'])
+
+    def finish(self, key, future):
+        del self.pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    async def recommend_batch(self, records):
+        """Results in input order; cache misses are sent to the pool in chunks."""
+        results = [None] * len(records)
+        misses = []
+        for i, record in enumerate(records):
+            student, errors = self.validate(record)
+            if errors:
+                results[i] = {'student_id': student['student_id'], 'errors': errors}
+                continue
+            key, results[i] = self.cached(student)
+            if results[i] is None:
+                misses.append((i, key, student))
+        loop = asyncio.get_running_loop()
+        chunks = [misses[start:start + self.chunk_size] for start in range(0, len(misses), self.chunk_size)]
+        computed = await asyncio.gather(*(loop.run_in_executor(self.executor, _recommend_chunk_in_worker,
+                                                               [student for _, _, student in chunk])
+                                          for chunk in chunks))
+        for chunk, chunk_results in zip(chunks, computed):
+            for (i, key, _), result in zip(chunk, chunk_results):
+                results[i] = result
+                if key is not None:
+                    self.cache.put(key, result)
+        return results
+
+    def what_if(self, record, scenarios, explanation_format):
+        """what_if_json for one student, or the student's validation errors.
+        Runs in the event loop: a scenario takes tens of microseconds, less
+        than handing it to a worker."""
+        student, errors = self.validate(record)
+        if errors:
+            return {'student_id': student['student_id'], 'errors': errors}
+        return what_if_json(WhatIf(self.catalog, student, self.selection), scenarios, explanation_format)
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'catalog': self.catalog.fingerprint,
+            'courses': len(self.catalog),
+            'workers': self.workers,
+            'cache': self.cache.stats() if self.cache is not None else None
+        }
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def response_bytes(status, payload, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def read_message(reader):
+    """(start line, headers, body) of the next HTTP message, or None at EOF."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Request headers are too large.")
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length.")
+    if length < 0:
+        raise HttpError(400, "Invalid Content-Length.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+    body = await reader.readexactly(length) if length else b''
+    return lines[0], headers, body
+
+
+async def dispatch(service, method, path, body):
+    """(status, payload) for one request."""
+    routes = {'/recommend': 'POST', '/recommend/batch': 'POST', '/what-if': 'POST', '/health': 'GET'}
+    path, _, query = path.partition('?')
+    path = path.rstrip('/') or '/'
+    if path not in routes:
+        raise HttpError(404, f"No such endpoint: {path}")
+    if method != routes[path]:
+        raise HttpError(405, f"{path} expects {routes[path]}.")
+    if path == '/health':
+        return 200, service.health()
+    explanation_format = parse_qs(query).get('explanations', [service.explanation_format])[-1]
+    if explanation_format not in EXPLANATION_FORMATS:
+        raise HttpError(400, f"explanations must be one of: {', '.join(EXPLANATION_FORMATS)}")
+    try:
+        payload = json.loads(body or b'null')
+    except ValueError:
+        raise HttpError(400, "Request body is not valid JSON.")
+    if path == '/recommend':
+        result = await service.recommend(payload)
+        return (422 if 'errors' in result else 200), result_json(result, explanation_format)
+    if path == '/what-if':
+        if not isinstance(payload, dict) or not isinstance(payload.get('scenarios'), list):
+            raise HttpError(400, "Expected {\"student\": {...}, \"scenarios\": [...]}.")
+        result = service.what_if(payload.get('student'), payload['scenarios'], explanation_format)
+        if 'errors' in result:
+            return 422, result
+        invalid = [str(i) for i, scenario in enumerate(result['scenarios']) if 'errors' in scenario]
+        if invalid:
+            return 400, dict(result, error=f"Invalid scenarios (by position): {', '.join(invalid)}")
+        return 200, result
+    if isinstance(payload, dict):
+        payload = payload.get('students')
+    if not isinstance(payload, list):
+        raise HttpError(400, "Expected a list of students or {\"students\": [...]}.")
+    results = await service.recommend_batch(payload)
+    return 200, {'results': [result_json(result, explanation_format) for result in results]}
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                start_line, headers, body = message
+                parts = start_line.split(' ')
+                if len(parts) != 3:
+                    raise HttpError(400, "Malformed request line.")
+                method, path, version = parts
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                status, payload = await dispatch(service, method, path, body)
+            except HttpError as e:
+                status, payload, keep_alive = e.status, {'error': e.message}, False
+            except Exception as e:
+                status, payload, keep_alive = 500, {'error': str(e)}, False
+            writer.write(response_bytes(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8000, backlog=1024):
+    await service.warm_up()
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer),
+                                      host, port, backlog=backlog)
+
+
+class RecommendationClient:
+    """Stand-in for the registration portal: a keep-alive HTTP/1.1 JSON
+    client over asyncio streams, one request at a time per connection."""
+
+    def __init__(self, host='127.0.0.1', port=8000):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+        await self.writer.drain()
+        message = await read_message(self.reader)
+        if message is None:
+            await self.close()
+            raise ConnectionError("Server closed the connection.")
+        status_line, headers, body = message
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return int(status_line.split(' ')[1]), json.loads(body)
+
+    async def recommend(self, student):
+        return await self.request('POST', '/recommend', student)
+
+    async def recommend_batch(self, students):
+        return await self.request('POST', '/recommend/batch', students)
+
+    async def what_if(self, student, scenarios):
+        return await self.request('POST', '/what-if', {'student': student, 'scenarios': scenarios})
+
+    async def health(self):
+        return await self.request('GET', '/health')
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_client(students, host, port, concurrency=32):
+    """Send every student over ``concurrency`` connections; return the
+    results in input order and the elapsed seconds."""
+    results = [None] * len(students)
+    queue = asyncio.Queue()
+    for item in enumerate(students):
+        queue.put_nowait(item)
+
+    async def connection():
+        client = RecommendationClient(host, port)
+        try:
+            while not queue.empty():
+                i, student = queue.get_nowait()
+                results[i] = (await client.recommend(student))[1]
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(min(concurrency, len(students)) or 1)))
+    return results, time.perf_counter() - start
+
+
+async def serve(args):
+    service = RecommendationService(args.catalog, args.engine, args.workers, args.cache_size, args.chunk_size,
+                                    args.selection, args.explanations)
+    server = await start_server(service, args.host, args.port)
+    print(f"Serving {len(service.catalog)} courses on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+async def client(args):
+    students = list(read_students(args.students))
+    service = server = None
+    host, port = args.host, args.port
+    if args.local:
+        service = RecommendationService(args.catalog, args.engine, args.workers, args.cache_size, args.chunk_size,
+                                        args.selection, args.explanations)
+        server = await start_server(service, host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        results, elapsed = await run_client(students, host, port, args.concurrency)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            write_jsonl(results, out)
+    print(f"{len(students)} requests in {elapsed:.2f} s ({len(students) / elapsed:.1f} req/s)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP recommendation service and a stand-in client.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="Run the service")
+    client_parser = commands.add_parser('client', help="Send a student file to the service")
+    client_parser.add_argument('students', help="CSV or JSONL student records")
+    client_parser.add_argument('-o', '--output', help="Write the responses as JSONL")
+    client_parser.add_argument('--concurrency', type=int, default=32, help="Parallel connections")
+    client_parser.add_argument('--local', action='store_true', help="Start the service in this process on a free port")
+    for command in (serve_parser, client_parser):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8000)
+        command.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot")
+        command.add_argument('--engine', choices=list(ENGINES), help="Recommendation engine (default: $RECOMMENDATION_ENGINE or experta)")
+        command.add_argument('--selection', choices=SELECTIONS, help="How eligible courses share the credit cap (default: $RECOMMENDATION_SELECTION or greedy)")
+        command.add_argument('--explanations', choices=EXPLANATION_FORMATS, default='text',
+                             help="Default explanation format of responses (override with ?explanations=)")
+        command.add_argument('--workers', type=int, default=0, help="Engine processes (0 = one engine thread in the server process)")
+        command.add_argument('--cache-size', type=int, default=10000, help="Cached results kept in memory (0 disables the cache)")
+        command.add_argument('--chunk-size', type=int, default=32, help="Students per worker task in batch requests")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else client(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# seat_ledger.py
+# Section capacities and seat reservations for registration day. The catalog
+# gives a course its sections and seats per section (course_catalog.SEAT_COLUMNS);
+# an engine given a SeatLedger (engine.set_seats) reserves a seat for every
+# course it recommends and explains SECTION_FULL when none is left.
+#
+#   python batch_recommendation.py students.jsonl --seats -o advising.jsonl
+#   python batch_recommendation.py students.jsonl --section-capacity 120 --seat-store seats.db
+#   python seat_ledger.py simulate students.jsonl --section-capacity 40 --threads 16 --store seats.db
+#   python seat_ledger.py report seats.db
+#
+# Every reservation has its own priority: 'retake' for a failed course offered
+# in the student's term, then 'senior' or 'standard' by the student's standing
+# for the rest. Seats go to retakes first, then seniors, then everyone else.
+# Batch runs reserve in that order: a first pass over the cohort takes only
+# the retake seats (SeatLedger.reserving), then seniors run before the rest.
+# Concurrent requests cannot be ordered, so there a share of every course's
+# seats (SEAT_HOLDS) is held for the more urgent tiers until release_holds()
+# opens it to all.
+#
+# Every course is guarded by one of ``stripes`` locks: the check and the take
+# of a seat are atomic, and requests for different courses rarely wait on
+# each other.
+import argparse
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_snapshot import load_catalog
+from course_catalog import CATALOG_FILE, course_fact_fields, section_capacities
+from recommendation_pipeline import (ENGINES, create_engine, normalize_student, validate_student, run_engine,
+                                     recommendation_result, result_json)
+
+SEAT_PRIORITIES = ['retake', 'senior', 'standard']
+# Share of each course's seats held for a tier, on top of the tiers before it
+SEAT_HOLDS = {'retake': 0.1, 'senior': 0.2}
+
+
+class SeatLedger:
+    """Seats taken in every course section, shared by any number of engines
+    and threads.
+
+    ``capacities`` maps course codes to the seats of each of their sections
+    (see course_catalog.section_capacities); other courses are unlimited.
+    Given a SeatStore, the reservations it holds are loaded and new ones are
+    written through to it.
+    """
+
+    def __init__(self, capacities, holds=SEAT_HOLDS, stripes=16, store=None):
+        self.capacities = {code: list(seats) for code, seats in capacities.items()}
+        self.holds = {code: {priority: int(sum(seats) * holds.get(priority, 0)) for priority in SEAT_PRIORITIES}
+                      for code, seats in self.capacities.items()}
+        self.holding = bool(holds)
+        self.stripes = [threading.Lock() for _ in range(max(1, stripes))]
+        self.locks = {code: self.stripes[i % len(self.stripes)] for i, code in enumerate(self.capacities)}
+        self.taken = {code: [0] * len(seats) for code, seats in self.capacities.items()}
+        self.by_priority = {code: dict.fromkeys(SEAT_PRIORITIES, 0) for code in self.capacities}
+        self.holders = {code: {} for code in self.capacities}
+        self.refused = dict.fromkeys(self.capacities, 0)
+        # Priorities that take seats; reserve() only checks for the others
+        self.reserving = tuple(SEAT_PRIORITIES)
+        self.store = store
+        if store is not None:
+            store.save_sections(self.capacities)
+            for student_id, course_id, section, priority in store.reservations():
+                if course_id in self.capacities and section < len(self.capacities[course_id]):
+                    self._take(student_id, course_id, section, priority)
+
+    def capacity(self, course_id):
+        """Total seats in ``course_id``'s sections, None if unlimited."""
+        seats = self.capacities.get(course_id)
+        return None if seats is None else sum(seats)
+
+    def _open_seats(self, course_id, priority):
+        free = sum(self.capacities[course_id]) - sum(self.taken[course_id])
+        if self.holding:
+            for tier in SEAT_PRIORITIES[:SEAT_PRIORITIES.index(priority)]:
+                free -= max(0, self.holds[course_id][tier] - self.by_priority[course_id][tier])
+        return free
+
+    def _take(self, student_id, course_id, section, priority):
+        self.taken[course_id][section] += 1
+        self.by_priority[course_id][priority] += 1
+        self.holders[course_id][student_id] = (section, priority)
+
+    def available(self, course_id, priority='standard'):
+        """Seats in ``course_id`` a ``priority`` student could still take, None if unlimited."""
+        if course_id not in self.capacities:
+            return None
+        with self.locks[course_id]:
+            return max(0, self._open_seats(course_id, priority))
+
+    def can_reserve(self, student_id, course_id, priority='standard'):
+        if course_id not in self.capacities:
+            return True
+        with self.locks[course_id]:
+            return student_id in self.holders[course_id] or self._open_seats(course_id, priority) > 0
+
+    def reserve(self, student_id, course_id, priority='standard'):
+        """Seat ``student_id`` in the emptiest section of ``course_id``; False
+        if no seat is open to ``priority``. Reserving a held seat again is a
+        no-op, and a priority outside ``reserving`` only checks for a seat."""
+        if course_id not in self.capacities:
+            return True
+        if priority not in self.reserving:
+            return self.can_reserve(student_id, course_id, priority)
+        with self.locks[course_id]:
+            if student_id in self.holders[course_id]:
+                return True
+            if self._open_seats(course_id, priority) <= 0:
+                self.refused[course_id] += 1
+                return False
+            seats, taken = self.capacities[course_id], self.taken[course_id]
+            section = max(range(len(seats)), key=lambda i: seats[i] - taken[i])
+            self._take(student_id, course_id, section, priority)
+            if self.store is not None:
+                self.store.reserve(student_id, course_id, section, priority)
+            return True
+
+    def release(self, student_id, course_id):
+        """Give back ``student_id``'s seat in ``course_id``; False if they held none."""
+        if course_id not in self.capacities:
+            return False
+        with self.locks[course_id]:
+            held = self.holders[course_id].pop(student_id, None)
+            if held is None:
+                return False
+            section, priority = held
+            self.taken[course_id][section] -= 1
+            self.by_priority[course_id][priority] -= 1
+            if self.store is not None:
+                self.store.release(student_id, course_id)
+            return True
+
+    def release_unused(self, student_id, keep):
+        """Give back ``student_id``'s seats in every course not in ``keep``."""
+        for course_id in self.capacities:
+            if course_id not in keep and self.section_of(student_id, course_id) is not None:
+                self.release(student_id, course_id)
+
+    def release_holds(self):
+        """Open the held seats to every tier, e.g. once the priority window closes."""
+        self.holding = False
+
+    def section_of(self, student_id, course_id):
+        held = self.holders.get(course_id, {}).get(student_id)
+        return None if held is None else held[0]
+
+    def stats(self):
+        stats = {}
+        for course_id, seats in self.capacities.items():
+            with self.locks[course_id]:
+                stats[course_id] = {
+                    'sections': list(seats),
+                    'taken': list(self.taken[course_id]),
+                    'by_priority': dict(self.by_priority[course_id]),
+                    'refused': self.refused[course_id]
+                }
+        return stats
+
+    def report(self):
+        """Plain-text fill of every course with a seat taken or refused, fullest first."""
+        stats = self.stats()
+        used = [(course_id, data) for course_id, data in stats.items() if sum(data['taken']) or data['refused']]
+        used.sort(key=lambda item: -sum(item[1]['taken']) / max(sum(item[1]['sections']), 1))
+        lines = [f"{'course':<10}{'seats':>7}{'taken':>7}" + ''.join(f"{tier:>10}" for tier in SEAT_PRIORITIES)
+                 + f"{'refused':>9}  sections"]
+        for course_id, data in used:
+            lines.append(f"{course_id:<10}{sum(data['sections']):>7}{sum(data['taken']):>7}"
+                         + ''.join(f"{data['by_priority'][tier]:>10}" for tier in SEAT_PRIORITIES)
+                         + f"{data['refused']:>9}  "
+                         + ' '.join(f"{taken}/{seats}" for taken, seats in zip(data['taken'], data['sections'])))
+        return "\n".join(lines)
+
+
+class SeatStore:
+    """SQLite stand-in for the registrar's section database: a row per
+    section and per reservation. Safe to share between threads."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sections "
+                        "(course_id TEXT, section INTEGER, seats INTEGER, PRIMARY KEY (course_id, section))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS reservations "
+                        "(student_id TEXT, course_id TEXT, section INTEGER, priority TEXT, "
+                        "PRIMARY KEY (student_id, course_id))")
+        self.db.commit()
+
+    def save_sections(self, capacities):
+        with self.lock:
+            self.db.execute("DELETE FROM sections")
+            self.db.executemany("INSERT INTO sections (course_id, section, seats) VALUES (?, ?, ?)",
+                                [(course_id, section, count) for course_id, seats in capacities.items()
+                                 for section, count in enumerate(seats)])
+            self.db.commit()
+
+    def sections(self):
+        """Course code -> seats per section, as saved by the last ledger."""
+        capacities = {}
+        with self.lock:
+            for course_id, section, count in self.db.execute(
+                    "SELECT course_id, section, seats FROM sections ORDER BY course_id, section"):
+                capacities.setdefault(course_id, []).append(count)
+        return capacities
+
+    def reservations(self):
+        with self.lock:
+            return self.db.execute("SELECT student_id, course_id, section, priority FROM reservations").fetchall()
+
+    def reserve(self, student_id, course_id, section, priority):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO reservations (student_id, course_id, section, priority) "
+                            "VALUES (?, ?, ?, ?)", (student_id, course_id, section, priority))
+            self.db.commit()
+
+    def release(self, student_id, course_id):
+        with self.lock:
+            self.db.execute("DELETE FROM reservations WHERE student_id = ? AND course_id = ?", (student_id, course_id))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM reservations")
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def registration_day(students, courses_df, seats, threads=16, engine_kind=None, selection=None, catalog=None):
+    """Result dicts for raw ``students`` records, in input order, computed by
+    ``threads`` concurrent requests that reserve against the SeatLedger
+    ``seats``; each thread runs its own engine."""
+    course_codes = set(courses_df['Course Code'])
+    course_facts = course_fact_fields(courses_df)
+    engines = threading.local()
+
+    def recommend(record):
+        student = normalize_student(record)
+        errors = validate_student(student, course_codes)
+        if errors:
+            return {'student_id': student['student_id'], 'errors': errors}
+        engine = getattr(engines, 'engine', None)
+        if engine is None:
+            engine = engines.engine = create_engine(courses_df, catalog, engine_kind, selection)
+            engine.set_seats(seats)
+        return recommendation_result(student, run_engine(courses_df, student, course_facts, engine))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(recommend, students))
+
+
+def main(argv=None):
+    from batch_recommendation import read_students, write_jsonl
+
+    parser = argparse.ArgumentParser(description="Section seat reservations for registration day.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    simulate = commands.add_parser('simulate', help="Recommend for a cohort with concurrent requests sharing the seats")
+    simulate.add_argument('students', help="CSV or JSONL student records")
+    simulate.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot")
+    simulate.add_argument('--section-capacity', type=int,
+                          help="Seats per section for courses without a Section Capacity in the catalog")
+    simulate.add_argument('--threads', type=int, default=16, help="Concurrent requests")
+    simulate.add_argument('--engine', choices=list(ENGINES), help="Recommendation engine (default: $RECOMMENDATION_ENGINE or experta)")
+    simulate.add_argument('--store', help="SQLite file standing in for the registrar's section database")
+    simulate.add_argument('--no-holds', action='store_true', help="Do not hold seats for retakes and seniors")
+    simulate.add_argument('-o', '--output', help="Write the results as JSONL")
+    report = commands.add_parser('report', help="Seat fill of a store written by an earlier run")
+    report.add_argument('store', help="SQLite seat store")
+    args = parser.parse_args(argv)
+
+    if args.command == 'report':
+        store = SeatStore(args.store)
+        print(SeatLedger(store.sections(), store=store).report())
+        store.close()
+        return
+    courses_df, catalog = load_catalog(args.catalog)
+    store = SeatStore(args.store) if args.store else None
+    seats = SeatLedger(section_capacities(courses_df, args.section_capacity), {} if args.no_holds else SEAT_HOLDS,
+                       store=store)
+    results = registration_day(list(read_students(args.students)), courses_df, seats, args.threads, args.engine,
+                               catalog=catalog)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            write_jsonl((result_json(result) for result in results), out)
+    print(seats.report(), file=sys.stderr)
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
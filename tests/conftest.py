@@ -0,0 +1,21 @@
+# conftest.py
+# The modules live at the repository root; the catalog CSV is loaded once.
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from course_catalog import CATALOG_FILE, load_courses
+
+
+@pytest.fixture
+def catalog_path():
+    return os.path.join(ROOT, CATALOG_FILE)
+
+
+@pytest.fixture
+def courses_df(catalog_path):
+    return load_courses(catalog_path)
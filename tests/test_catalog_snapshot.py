@@ -0,0 +1,28 @@
+import pandas as pd
+
+from catalog_snapshot import CatalogSnapshot, write_snapshot
+from course_catalog import compile_catalog, load_courses
+
+
+def test_snapshot_round_trip(courses_df, tmp_path):
+    # A co-requisite, a requisite missing from the catalog and an empty description
+    courses_df.loc[courses_df['Course Code'] == 'CSE014', 'Co-requisites'] = 'UC1'
+    courses_df.loc[courses_df['Course Code'] == 'UE1', 'Prerequisites'] = 'XYZ999'
+    courses_df.loc[courses_df['Course Code'] == 'UC2', 'Description'] = None
+    csv_path = str(tmp_path / 'catalog.csv')
+    snapshot_path = str(tmp_path / 'catalog.snapshot')
+    courses_df.to_csv(csv_path, index=False)
+    expected_df = load_courses(csv_path)
+    expected = compile_catalog(expected_df)
+
+    header = write_snapshot(expected_df, snapshot_path)
+    snapshot = CatalogSnapshot(snapshot_path)
+    df = snapshot.to_dataframe()
+    catalog = snapshot.catalog_index(df)
+
+    pd.testing.assert_frame_equal(df, expected_df)
+    pd.testing.assert_frame_equal(load_courses(snapshot_path), expected_df)
+    assert header['fingerprint'] == catalog.fingerprint == expected.fingerprint
+    for column in ['prereq_ids', 'prereq_masks', 'coreq_ids', 'coreq_masks', 'dependent_masks', 'unlock_counts']:
+        assert getattr(catalog, column) == getattr(expected, column), column
+    snapshot.close()
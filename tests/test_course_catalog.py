@@ -0,0 +1,101 @@
+import random
+
+import pandas as pd
+import pytest
+
+from course_catalog import CatalogCycleError, CatalogIndex, CatalogStore, course_fact_fields
+
+INDEX_COLUMNS = ['codes', 'ids', 'prerequisites', 'corequisites', 'senior_standing', 'credits', 'semesters',
+                 'year_values', 'prereq_ids', 'prereq_masks', 'coreq_ids', 'coreq_masks', 'fingerprint',
+                 'dependent_masks', 'prereq_closure', 'dependent_closure', 'unlock_counts', 'heights', 'order']
+
+
+def assert_consistent(store):
+    fresh = CatalogIndex(store.courses_df)
+    for column in INDEX_COLUMNS:
+        assert getattr(store.catalog, column) == getattr(fresh, column), column
+    assert store.course_facts == course_fact_fields(store.courses_df)
+
+
+def random_row(rng, codes, code):
+    return {
+        'Course Code': code,
+        'Course Name': f"Course {code}",
+        'Description': '',
+        'Prerequisites': ' AND '.join(rng.sample(codes, rng.randint(0, 2))),
+        'Co-requisites': ','.join(rng.sample(codes, rng.randint(0, 1))),
+        'Credit Hours': rng.choice([1, 2, 3, 4]),
+        'Semester Offered': rng.choice(['Fall', 'Spring']),
+        'Year': rng.randint(1, 4)
+    }
+
+
+def test_store_matches_a_fresh_compile_after_random_changes(courses_df):
+    rng = random.Random(7)
+    store = CatalogStore(courses_df)
+    for step in range(60):
+        codes = list(store.catalog.codes)
+        action = rng.choice(['add', 'edit', 'edit', 'delete'])
+        held_df, held_catalog = store.courses_df, store.catalog
+        held_rows = held_df.to_dict('records')
+        try:
+            if action == 'add':
+                store.add_course(random_row(rng, codes, f"NEW{step}"))
+            elif action == 'edit':
+                code = rng.choice(codes)
+                row = random_row(rng, [other for other in codes if other != code], code)
+                del row['Course Code']
+                store.edit_course(code, rng.choice([row, {'Credit Hours': row['Credit Hours']}]))
+            else:
+                store.delete_course(rng.choice(codes))
+        except CatalogCycleError:
+            assert store.courses_df is held_df and store.catalog is held_catalog
+        # The frame held from before the change is not touched by it
+        assert held_df.to_dict('records') == held_rows
+        assert_consistent(store)
+
+
+def small_catalog():
+    """A -> B, C -> D -> E (D needs both B and C); X names a missing course F."""
+    prerequisites = {'A': '', 'B': 'A', 'C': 'A', 'D': 'B AND C', 'E': 'D', 'X': 'F'}
+    return pd.DataFrame([{'Course Code': code, 'Course Name': code, 'Prerequisites': prereqs, 'Co-requisites': '',
+                          'Credit Hours': 3, 'Semester Offered': 'Fall', 'Year': 1}
+                         for code, prereqs in prerequisites.items()])
+
+
+def test_unlocks_follow_the_prerequisite_graph():
+    catalog = CatalogIndex(small_catalog())
+    a, b, c, d, e, x = (catalog.ids[code] for code in 'ABCDEX')
+
+    assert catalog.unlock_counts == [4, 2, 2, 1, 0, 0]
+    assert catalog.heights == [4, 3, 3, 2, 1, 1]
+    assert catalog.codes_of(catalog.prereq_closure[e]) == ['A', 'B', 'C', 'D']
+    assert catalog.codes_of(catalog.unlocked_by(a)) == ['B', 'C']
+    # D also needs C, and nothing is unlocked twice
+    assert catalog.unlocked_by(b, 1 << a) == 0
+    assert catalog.codes_of(catalog.unlocked_by(b, 1 << a | 1 << c)) == ['D']
+    assert catalog.unlocked_by(a, 1 << b) == 1 << c
+    assert catalog.unlocked_by(x) == 0
+
+
+@pytest.mark.parametrize('change, cycle', [
+    (lambda store: store.edit_course('A', {'Prerequisites': 'A'}), {'A'}),
+    (lambda store: store.edit_course('A', {'Prerequisites': 'B'}), {'A', 'B'}),
+    (lambda store: store.add_course({'Course Code': 'F', 'Prerequisites': 'F', 'Credit Hours': 3,
+                                     'Semester Offered': 'Fall', 'Year': 1}), {'F'}),
+    (lambda store: store.add_course({'Course Code': 'F', 'Prerequisites': 'X', 'Credit Hours': 3,
+                                     'Semester Offered': 'Fall', 'Year': 1}), {'F', 'X'})
+])
+def test_changes_that_close_a_cycle_are_rejected(change, cycle):
+    store = CatalogStore(small_catalog())
+    courses_df, catalog, course_facts = store.courses_df, store.catalog, store.course_facts
+    rows = courses_df.to_dict('records')
+
+    with pytest.raises(CatalogCycleError) as error:
+        change(store)
+
+    assert set(error.value.cycle) == cycle and error.value.cycle[0] == error.value.cycle[-1]
+    assert store.courses_df is courses_df and store.catalog is catalog and store.course_facts is course_facts
+    assert store.version == 0 and store.changes == []
+    assert courses_df.to_dict('records') == rows
+    assert_consistent(store)
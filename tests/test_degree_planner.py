@@ -0,0 +1,33 @@
+from course_catalog import compile_catalog, course_fact_fields
+from degree_planner import DegreePlanner
+from explanations import Reason
+from fast_engine import random_students
+from recommendation_pipeline import create_engine, normalize_student, recommendation_result, run_engine
+
+
+def test_every_planned_term_is_one_the_engine_allows(courses_df):
+    catalog = compile_catalog(courses_df)
+    planner = DegreePlanner(catalog)
+    engine = create_engine(courses_df, catalog, 'fast')
+    course_facts = course_fact_fields(courses_df)
+    for record in random_students(courses_df, 40, seed=3):
+        student = normalize_student(dict(record, failed_courses=[]))
+        plan = planner.plan(student['completed_courses'], student['cgpa'], student['semester'], student['year'],
+                            time_limit=0.05)
+        completed = list(student['completed_courses'])
+        for term in plan['terms']:
+            term_student = dict(student, completed_courses=completed, semester=term['semester'], year=term['year'])
+            result = recommendation_result(term_student, run_engine(courses_df, term_student, course_facts, engine))
+            # Courses the engine left out only for the credit cap are eligible too
+            eligible = set(result['recommendations']) | {course_id for reason, course_id, _ in result['explanations']
+                                                         if reason == Reason.EXCEEDS_CREDIT_LIMIT}
+            assert set(term['courses']) <= eligible, (student['student_id'], term)
+            completed += term['courses']
+
+
+def test_a_course_offered_in_both_semesters_is_not_planned(courses_df):
+    courses_df.loc[courses_df['Course Code'] == 'UE1', 'Semester Offered'] = 'Both'
+    plan = DegreePlanner(compile_catalog(courses_df)).plan([], 3.0, 'Fall', 1)
+
+    assert plan['terms'] is None
+    assert plan['explanations'] == ["Cannot plan UE1: no term matches its Semester Offered (Both)."]
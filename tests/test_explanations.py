@@ -0,0 +1,34 @@
+import math
+
+import pytest
+
+from explanations import (EXPLANATIONS_PER_PAGE, Reason, explanation_pages, recommendation_html,
+                          render_explanation)
+from recommendation_pipeline import create_engine, normalize_student, recommendation_result, run_engine
+
+
+@pytest.mark.parametrize('count', [0, 1, 24, 25, 26, 50, 61])
+def test_pages_keep_every_explanation_in_order(count):
+    explanations = [f"<div>{i}</div>" for i in range(count)]
+    pages = explanation_pages(explanations)
+
+    assert len(pages) == math.ceil(count / EXPLANATIONS_PER_PAGE)
+    assert all(len(page) == EXPLANATIONS_PER_PAGE for page in pages[:-1])
+    assert [explanation for page in pages for explanation in page] == explanations
+
+
+def test_recommendation_html_renders_every_record_in_order(courses_df):
+    student = normalize_student({'student_id': 'S1', 'cgpa': 3.1, 'year': 2, 'semester': 'Fall',
+                                 'completed_courses': ['MAT111', 'PHY211'], 'failed_courses': ['CSE014']})
+    result = recommendation_result(student, run_engine(courses_df, student, engine=create_engine(courses_df, None, 'fast')))
+    summaries = {row['Course Code']: (row['Credit Hours'], row['Semester Offered'], row['Year'])
+                 for row in courses_df.to_dict('records')}
+
+    courses, explanations = recommendation_html(result, summaries)
+
+    assert len(result['explanations']) > EXPLANATIONS_PER_PAGE
+    assert courses.count('class="recommended-course"') == len(result['recommendations'])
+    assert len(explanations) == len(result['explanations'])
+    for block, record in zip(explanations, result['explanations']):
+        assert render_explanation(record) in block
+        assert ('explanation-success' in block) == (record[0] == Reason.RECOMMENDED)
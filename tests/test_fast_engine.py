@@ -0,0 +1,10 @@
+import pytest
+
+from course_selection import SELECTIONS
+from fast_engine import check_parity, random_students
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_fast_engine_matches_experta(courses_df, selection):
+    students = random_students(courses_df, 500, seed=1)
+    assert check_parity(courses_df, students, selection) == []
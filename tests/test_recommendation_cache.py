@@ -0,0 +1,23 @@
+from course_catalog import CatalogStore
+from recommendation_cache import RecommendationCache
+from recommendation_pipeline import create_engine, recommendation_result, run_engine
+
+STUDENT = {'student_id': 'S1', 'cgpa': 1.5, 'completed_courses': [], 'failed_courses': [],
+           'semester': 'Fall', 'year': 1}
+
+
+def test_knapsack_entries_follow_prerequisite_edits(courses_df):
+    store = CatalogStore(courses_df)
+    cache = RecommendationCache()
+    engine = create_engine(store.courses_df, store.catalog, 'fast', 'knapsack')
+    cache.sync(store)
+    cache.recommend(store.courses_df, STUDENT, store.course_facts, engine)
+
+    # E3 is a Year 4 course, outside the student's year window, but needing
+    # UC1 changes how many courses UC1 unlocks
+    store.edit_course('E3', {'Prerequisites': 'UC1'})
+    cache.sync(store)
+    engine.sync_catalog(store)
+    cached = cache.recommend(store.courses_df, STUDENT, store.course_facts, engine)
+    fresh = create_engine(store.courses_df, store.catalog, 'fast', 'knapsack')
+    assert cached == recommendation_result(STUDENT, run_engine(store.courses_df, STUDENT, store.course_facts, fresh))
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+import batch_recommendation
+from fast_engine import random_students
+from recommendation_export import ResultExport
+
+INTERRUPT_AFTER = 35
+
+
+def export(students, output, *options):
+    batch_recommendation.main([str(students), '--engine', 'fast', '-o', str(output), '--checkpoint-every', '10',
+                               *options])
+
+
+@pytest.mark.parametrize('name', ['results.jsonl.gz', 'results.csv'])
+def test_resumed_export_matches_an_uninterrupted_one(courses_df, tmp_path, monkeypatch, name):
+    students = tmp_path / 'students.jsonl'
+    students.write_text(''.join(json.dumps(record) + '\n' for record in random_students(courses_df, 60, seed=2)))
+    (tmp_path / 'full').mkdir()
+    (tmp_path / 'resumed').mkdir()
+    export(students, tmp_path / 'full' / name)
+
+    recommend_batch = batch_recommendation.recommend_batch
+
+    def interrupted(*args, **kwargs):
+        for count, result in enumerate(recommend_batch(*args, **kwargs)):
+            if count == INTERRUPT_AFTER:
+                raise KeyboardInterrupt
+            yield result
+
+    # The process dies before its final checkpoint: the results written
+    # since the last one are in the file but not in the checkpoint
+    with monkeypatch.context() as patch:
+        patch.setattr(batch_recommendation, 'recommend_batch', interrupted)
+        patch.setattr(ResultExport, 'close', lambda self: self.writer.close())
+        with pytest.raises(KeyboardInterrupt):
+            export(students, tmp_path / 'resumed' / name)
+    export(students, tmp_path / 'resumed' / name, '--resume')
+
+    assert (tmp_path / 'resumed' / name).read_bytes() == (tmp_path / 'full' / name).read_bytes()
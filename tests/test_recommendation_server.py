@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from recommendation_pipeline import create_engine, normalize_student, recommendation_result, result_json, run_engine
+from recommendation_server import RecommendationClient, RecommendationService, read_message, start_server
+
+STUDENTS = [
+    {'student_id': 'S1', 'cgpa': 3.1, 'year': 2, 'semester': 'Fall', 'completed_courses': ['MAT111', 'PHY211']},
+    {'student_id': 'S2', 'cgpa': 1.8, 'year': 1, 'semester': 'Spring', 'completed_courses': 'MAT111,CSE014',
+     'failed_courses': 'UC1'}
+]
+
+
+@pytest.fixture
+def server(catalog_path):
+    """Runs ``test(port)`` against an in-process server and returns its result."""
+    def run(test):
+        async def main():
+            service = RecommendationService(catalog_path, 'fast', workers=0)
+            listener = await start_server(service, '127.0.0.1', 0)
+            try:
+                return await test(listener.sockets[0].getsockname()[1])
+            finally:
+                listener.close()
+                await listener.wait_closed()
+                service.close()
+        return asyncio.run(main())
+    return run
+
+
+def with_client(test):
+    async def run(port):
+        client = RecommendationClient('127.0.0.1', port)
+        try:
+            return await test(client)
+        finally:
+            await client.close()
+    return run
+
+
+async def raw_request(port, data):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    status_line, _, body = await read_message(reader)
+    writer.close()
+    return int(status_line.split(' ')[1]), json.loads(body)
+
+
+def expected_result(courses_df, record):
+    student = normalize_student(record)
+    engine = create_engine(courses_df, None, 'fast')
+    return result_json(recommendation_result(student, run_engine(courses_df, student, engine=engine)))
+
+
+def test_recommend(server, courses_df):
+    async def test(client):
+        return [await client.recommend(STUDENTS[0]), await client.recommend(dict(STUDENTS[0], cgpa=7))]
+    (status, result), (invalid_status, invalid) = server(with_client(test))
+
+    assert status == 200 and result == expected_result(courses_df, STUDENTS[0])
+    assert invalid_status == 422 and invalid['errors']
+
+
+def test_recommend_batch(server, courses_df):
+    async def test(client):
+        return [await client.recommend_batch(STUDENTS), await client.recommend_batch({'students': STUDENTS})]
+    (status, listed), (wrapped_status, wrapped) = server(with_client(test))
+
+    assert status == wrapped_status == 200
+    assert listed == wrapped == {'results': [expected_result(courses_df, record) for record in STUDENTS]}
+
+
+def test_what_if_with_a_bad_scenario(server):
+    async def test(client):
+        return [await client.what_if(STUDENTS[0], [{'add_completed': ['CSE111']}]),
+                await client.what_if(STUDENTS[0], [{'add_completed': ['CSE111']}, {'add_completed': 5}])]
+    (status, result), (bad_status, bad) = server(with_client(test))
+
+    assert status == 200 and 'changes' in result['scenarios'][0]
+    assert bad_status == 400
+    assert bad['scenarios'][0] == result['scenarios'][0]
+    assert bad['scenarios'][1]['errors'] == ["add_completed must be a list of course codes or a comma-separated string."]
+
+
+@pytest.mark.parametrize('request_bytes', [
+    b"GARBAGE\r\n\r\n",
+    b"POST /recommend HTTP/1.1\r\nContent-Length: many\r\n\r\n",
+    b"POST /recommend HTTP/1.1\r\nContent-Length: -4\r\n\r\n",
+    b"POST /recommend HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops"
+])
+def test_malformed_requests_are_rejected(server, request_bytes):
+    status, payload = server(lambda port: raw_request(port, request_bytes))
+
+    assert status == 400 and payload['error']
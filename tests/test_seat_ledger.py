@@ -0,0 +1,52 @@
+import json
+
+from batch_recommendation import priority_order, recommend_batch, reserve_retakes
+from course_catalog import compile_catalog
+from recommendation_pipeline import create_engine, recommend_students
+from seat_ledger import SeatLedger
+
+
+def student(student_id):
+    return {'student_id': student_id, 'cgpa': 1.5, 'completed_courses': [], 'failed_courses': [],
+            'semester': 'Fall', 'year': 1}
+
+
+def test_knapsack_drops_a_corequisite_pair_together(courses_df):
+    courses_df.loc[courses_df['Course Code'] == 'CSE014', 'Co-requisites'] = 'UC1'
+    seats = SeatLedger({'UC1': [1]}, {})
+    engine = create_engine(courses_df, None, 'experta', 'knapsack')
+    engine.set_seats(seats)
+    # Both students see UC1's seat open during the rules; whichever is
+    # selected first takes it
+    results = recommend_students(courses_df, [student('S1'), student('S2')], engine=engine)
+    seated, refused = sorted(results, key=lambda result: 'UC1' not in result['recommendations'])
+
+    assert {'CSE014', 'UC1'} <= set(seated['recommendations'])
+    assert not {'CSE014', 'UC1'} & set(refused['recommendations'])
+    # The credits CSE014 and UC1 leave free go to UC2
+    assert sorted(refused['recommendations']) == ['MAT111', 'PHY211', 'UC2', 'UE1']
+    assert seats.section_of(refused['student_id'], 'UC1') is None
+
+
+def test_batch_seats_follow_each_reservations_priority(courses_df, tmp_path):
+    catalog = compile_catalog(courses_df)
+    senior_courses = [code for code, year in zip(courses_df['Course Code'], courses_df['Year'])
+                      if year <= 3 and code not in ('UE1', 'UC2')]
+    records = [
+        # MAT112 is not offered in Fall, so nothing of this student's is a retake
+        dict(student('F'), cgpa=2.5, failed_courses=['MAT112']),
+        dict(student('R'), cgpa=2.5, failed_courses=['UC2']),
+        {'student_id': 'SEN', 'cgpa': 3.6, 'completed_courses': senior_courses, 'failed_courses': [],
+         'semester': 'Fall', 'year': 4}
+    ]
+    path = tmp_path / 'students.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    seats = SeatLedger({'UE1': [1], 'UC2': [1]}, {})
+
+    reserve_retakes(priority_order(str(path), catalog), courses_df, seats, 'fast', catalog)
+    results = list(recommend_batch(priority_order(str(path), catalog), courses_df, 'fast', catalog=catalog,
+                                   seats=seats))
+
+    assert [result['student_id'] for result in results] == ['SEN', 'F', 'R']
+    assert seats.holders == {'UE1': {'SEN': (0, 'senior')}, 'UC2': {'R': (0, 'retake')}}
+    assert 'UC2' in results[2]['recommendations']
@@ -0,0 +1,17 @@
+from course_catalog import compile_catalog
+from what_if import WhatIf, scenario_errors
+
+STUDENT = {'student_id': 'S1', 'cgpa': 3.1, 'completed_courses': ['MAT111', 'PHY211', 'CSE014'],
+           'failed_courses': [], 'semester': 'Fall', 'year': 2}
+
+
+def test_course_fields_must_be_code_lists(courses_df):
+    codes = set(courses_df['Course Code'])
+    assert scenario_errors({'add_completed': 5}, codes) == [
+        "add_completed must be a list of course codes or a comma-separated string."]
+    assert scenario_errors({'remove_failed': ['CSE111', 7]}, codes)
+    assert scenario_errors({'add_completed': 'CSE111', 'add_failed': ['CSE112']}, codes) == []
+
+    results = WhatIf(compile_catalog(courses_df), STUDENT).compare([{'add_completed': 5}, {'cgpa': 3.6}])
+    assert 'errors' in results[0]
+    assert 'errors' not in results[1]
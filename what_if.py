@@ -0,0 +1,272 @@
+# what_if.py
+# "What if" questions about one student's recommendations: what if they pass
+# CSE111 this summer, clear a failed course, or their CGPA crosses 3.5?
+#
+#   python what_if.py --cgpa 3.1 --semester Fall --year 2 --completed MAT111,PHY211,CSE014 \
+#       --scenario '{"add_completed": ["CSE111"]}' --scenario '{"cgpa": 3.6}'
+#
+# A scenario is a transcript delta, a dict with any of SCENARIO_FIELDS.
+# Completing a course clears a failed grade in it and failing a course
+# removes it from the completed ones.
+#
+# A WhatIf keeps the student's base run in bitmask form: the requisite status
+# of every course and the term's firing order. A scenario recomputes only the
+# statuses it can change: the courses it adds or removes, the courses that
+# list those as prerequisites (CatalogIndex.dependent_masks), and the senior
+# standing courses if the completed credits cross 90. The engines' rule
+# passes (PASSES and EligibilityChecks.consider_course) and the credit cap are
+# then replayed over the statuses, because the cap ties every course to the
+# ones before it. The result is the same dict, explanations included, as a
+# full engine run on the changed transcript.
+import argparse
+import json
+import os
+import sys
+
+from course_catalog import CATALOG_FILE, compile_catalog, course_track, load_courses
+from course_selection import SELECTIONS
+from explanations import Reason, EXPLANATION_FORMATS
+from inference_engine import PASSES, SENIOR_STANDING_CREDITS, EligibilityChecks, Transcript, credit_limit_for
+from recommendation_pipeline import explain_unavailable_courses, recommendation_result, split_courses, result_json
+
+SCENARIO_FIELDS = ['add_completed', 'remove_completed', 'add_failed', 'remove_failed', 'cgpa']
+COURSE_FIELDS = SCENARIO_FIELDS[:4]
+
+
+def scenario_errors(scenario, course_codes):
+    """Problems with a scenario, [] if it can be evaluated (like validate_student)."""
+    if not isinstance(scenario, dict):
+        return ["A scenario must be a JSON object."]
+    errors = []
+    unknown = [field for field in scenario if field not in SCENARIO_FIELDS]
+    if unknown:
+        errors.append(f"Unknown scenario fields: {', '.join(unknown)} (expected: {', '.join(SCENARIO_FIELDS)})")
+    courses = {}
+    for field in COURSE_FIELDS:
+        value = scenario.get(field)
+        if not (value is None or isinstance(value, str)
+                or isinstance(value, list) and all(isinstance(course, str) for course in value)):
+            errors.append(f"{field} must be a list of course codes or a comma-separated string.")
+            continue
+        courses[field] = split_courses(value)
+        invalid = [course for course in courses[field] if course not in course_codes]
+        if invalid:
+            errors.append(f"Invalid courses in {field}: {', '.join(invalid)}")
+    both = set(courses.get('add_completed', [])) & set(courses.get('add_failed', []))
+    if both:
+        errors.append(f"Error: The following courses cannot be both completed and failed: {', '.join(sorted(both))}")
+    if 'cgpa' in scenario:
+        cgpa = scenario['cgpa']
+        if isinstance(cgpa, bool) or not isinstance(cgpa, (int, float)) or not (0.0 <= cgpa <= 4.0):
+            errors.append("CGPA must be between 0.0 and 4.0.")
+    return errors
+
+
+# (catalog fingerprint, semester, year) -> term_courses(), shared by every WhatIf
+_terms = {}
+
+
+def term_courses(catalog, semester, year):
+    """Course fact fields of the courses offered in a term, newest declared
+    first as the engines fire them."""
+    key = (catalog.fingerprint, semester, year)
+    if key not in _terms:
+        if len(_terms) >= 64:
+            _terms.clear()
+        term = semester.strip().lower()
+        _terms[key] = [{'course_id': catalog.codes[i], 'cid': i, 'credits': catalog.credits[i],
+                        'prerequisites': catalog.prerequisites[i], 'corequisites': catalog.corequisites[i],
+                        'track': course_track(catalog.codes[i])}
+                       for i in reversed(range(len(catalog)))
+                       if catalog.semesters[i].strip().lower() == term and catalog.year_values[i] <= year]
+    return _terms[key]
+
+
+class ScenarioChecks(EligibilityChecks):
+    """The engines' rule bodies over a WhatIf's precomputed requisite
+    statuses: only the prerequisite check is a lookup."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.statuses = None
+        self.clear_run_state()
+
+    def prerequisites_met(self, course_prereqs, completed_courses, course_id):
+        status = self.statuses[self.catalog.ids[course_id]]
+        if status is not None:
+            self.add_explanation(status[0], course_id, *status[2])
+        return status is None
+
+    def declare(self, *facts):
+        # Recommendation facts only matter to a RETE network
+        pass
+
+
+def recommendation_changes(base, result):
+    """What a scenario changes about the base recommendations."""
+    return {
+        'added': [course for course in result['recommendations'] if course not in base['recommendations']],
+        'dropped': [course for course in base['recommendations'] if course not in result['recommendations']],
+        'total_credits': result['total_credits'] - base['total_credits'],
+        'max_credits': result['max_credits'] - base['max_credits']
+    }
+
+
+def what_if_json(what_if, scenarios, explanation_format='text'):
+    """JSON-ready {"base": result, "scenarios": [result, ...]}; each valid
+    scenario's result also holds its "changes" (see recommendation_changes)."""
+    results = []
+    for result in what_if.compare(scenarios):
+        if 'errors' not in result:
+            result = dict(result_json(result, explanation_format),
+                          changes=recommendation_changes(what_if.base, result))
+        results.append(result)
+    return {'base': result_json(what_if.base, explanation_format), 'scenarios': results}
+
+
+class WhatIf:
+    """A normalized, valid ``student`` (see normalize_student) and their base
+    recommendations; scenario() answers one transcript delta and compare()
+    many. Results match CourseRecommendationEngine with the same
+    ``selection``."""
+
+    def __init__(self, catalog, student, selection='greedy'):
+        self.checks = ScenarioChecks(catalog)
+        self.checks.set_selection(selection)
+        self.catalog = catalog
+        self.student = student
+        self.selection = selection
+        self.course_codes = set(catalog.codes)
+        self.courses = term_courses(catalog, student['semester'], student['year'])
+        self.senior = catalog.mask(code for code, senior in zip(catalog.codes, catalog.senior_standing) if senior)
+        self.completed = catalog.mask(student['completed_courses'])
+        self.has_senior_standing = self.senior_standing(self.completed)
+        self.statuses = [self.requisite_status(i, self.completed, self.has_senior_standing)
+                         for i in range(len(catalog))]
+        self.base = self.run(self.completed, student['failed_courses'], student['cgpa'], self.statuses)
+
+    def senior_standing(self, completed):
+        return self.catalog.credits_of(completed) >= SENIOR_STANDING_CREDITS
+
+    def requisite_status(self, i, completed, senior):
+        """The explanation record that keeps course ``i`` out, None if its
+        prerequisites (or senior standing) are met."""
+        catalog = self.catalog
+        if catalog.senior_standing[i]:
+            return None if senior else (Reason.SENIOR_STANDING, catalog.codes[i], ())
+        if catalog.prereq_masks[i] & ~completed:
+            return (Reason.PREREQUISITES_NOT_MET, catalog.codes[i], (catalog.prerequisites[i],))
+        return None
+
+    def apply(self, scenario):
+        """(completed mask, failed course codes, cgpa) after ``scenario``."""
+        catalog = self.catalog
+        add_completed = split_courses(scenario.get('add_completed'))
+        add_failed = split_courses(scenario.get('add_failed'))
+        remove_failed = set(split_courses(scenario.get('remove_failed'))) | set(add_completed)
+        completed = self.completed & ~catalog.mask(split_courses(scenario.get('remove_completed')))
+        completed = (completed | catalog.mask(add_completed)) & ~catalog.mask(add_failed)
+        failed = [course for course in self.student['failed_courses'] if course not in remove_failed]
+        failed += [course for course in add_failed if course not in failed]
+        return completed, failed, scenario.get('cgpa', self.student['cgpa'])
+
+    def scenario(self, scenario):
+        """Result of the base student changed by ``scenario``; ValueError if it is invalid."""
+        errors = scenario_errors(scenario, self.course_codes)
+        if errors:
+            raise ValueError("; ".join(errors))
+        return self.evaluate(scenario)
+
+    def evaluate(self, scenario):
+        completed, failed, cgpa = self.apply(scenario)
+        statuses = self.statuses
+        senior = self.has_senior_standing
+        changed = completed ^ self.completed
+        if changed:
+            senior = self.senior_standing(completed)
+            affected = changed
+            for i in self.catalog.ids_of(changed):
+                affected |= self.catalog.dependent_masks[i]
+            if senior != self.has_senior_standing:
+                affected |= self.senior
+            statuses = list(statuses)
+            for i in self.catalog.ids_of(affected):
+                statuses[i] = self.requisite_status(i, completed, senior)
+        return self.run(completed, failed, float(cgpa), statuses)
+
+    def compare(self, scenarios):
+        """Results of several scenarios, in order, each against the base; an
+        invalid scenario gives {'student_id': ..., 'errors': [...]}."""
+        results = []
+        for scenario in scenarios:
+            errors = scenario_errors(scenario, self.course_codes)
+            if errors:
+                results.append({'student_id': self.student['student_id'], 'errors': errors})
+            else:
+                results.append(self.evaluate(scenario))
+        return results
+
+    def run(self, completed, failed_courses, cgpa, statuses):
+        """The engines' rule passes (PASSES through consider_course), the
+        selection stage and explain_unavailable_courses, over precomputed
+        requisite statuses."""
+        checks = self.checks
+        checks.clear_run_state()
+        checks.statuses = statuses
+        checks.select_student(self.student['student_id'])
+        max_credits = credit_limit_for(cgpa)
+        if max_credits is not None:
+            checks.set_credit_limit(max_credits)
+        transcript = checks.transcript = Transcript(completed, self.catalog.mask(failed_courses))
+        for reason, matches in PASSES:
+            for course in self.courses:
+                if not transcript.has_completed(course['cid']) and matches(course, transcript):
+                    checks.consider_course(course['course_id'], course['prerequisites'], course['corequisites'],
+                                           course['credits'], transcript, reason)
+        checks.select_candidates()
+        explain_unavailable_courses(checks, None, failed_courses, self.student['semester'], self.student['year'],
+                                    transcript)
+        return recommendation_result(self.student, checks)
+
+
+def main(argv=None):
+    # Imported here so WhatIf itself does not depend on the batch tools
+    from batch_recommendation import write_jsonl
+    from recommendation_pipeline import normalize_student, validate_student
+
+    parser = argparse.ArgumentParser(description="Compare a student's recommendations under transcript changes.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="Course catalog CSV or .snapshot")
+    parser.add_argument('--student-id', default='S1')
+    parser.add_argument('--cgpa', type=float, default=2.0)
+    parser.add_argument('--semester', default='Fall', choices=['Fall', 'Spring'])
+    parser.add_argument('--year', type=int, default=1)
+    parser.add_argument('--completed', default='', help="Comma-separated completed courses")
+    parser.add_argument('--failed', default='', help="Comma-separated failed courses")
+    parser.add_argument('--scenario', action='append', default=[],
+                        help=f"JSON transcript change with any of {', '.join(SCENARIO_FIELDS)} (repeatable)")
+    parser.add_argument('--selection', choices=SELECTIONS, help="How eligible courses share the credit cap (default: $RECOMMENDATION_SELECTION or greedy)")
+    parser.add_argument('--explanations', choices=EXPLANATION_FORMATS, default='text',
+                        help="Write explanations as text or as reason/course_id/params records")
+    args = parser.parse_args(argv)
+    try:
+        scenarios = [json.loads(scenario) for scenario in args.scenario]
+    except ValueError:
+        parser.error("--scenario must be a JSON object")
+
+    catalog = compile_catalog(load_courses(args.catalog))
+    student = normalize_student({'student_id': args.student_id, 'cgpa': args.cgpa, 'semester': args.semester,
+                                 'year': args.year, 'completed_courses': args.completed,
+                                 'failed_courses': args.failed})
+    errors = validate_student(student, set(catalog.codes))
+    if errors:
+        write_jsonl([{'student_id': student['student_id'], 'errors': errors}], sys.stdout)
+        return 1
+    what_if = WhatIf(catalog, student, args.selection or os.environ.get('RECOMMENDATION_SELECTION', 'greedy'))
+    results = what_if_json(what_if, scenarios, args.explanations)
+    write_jsonl([results['base']] + [dict(result, scenario=scenario)
+                                     for scenario, result in zip(scenarios, results['scenarios'])], sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())